@@ -5,6 +5,8 @@ Provides AI and OCR agents using OLLAMA and LangChain.
 
 from .ai_agent import AIAgent
 from .ocr_agent import OCRAgent
+from .semantic_cache import SemanticCache
+from .batching import AdaptiveBatchCollator
 
-__all__ = ['AIAgent', 'OCRAgent']
+__all__ = ['AIAgent', 'OCRAgent', 'SemanticCache', 'AdaptiveBatchCollator']
 __version__ = '1.0.0'
@@ -0,0 +1,53 @@
+"""
+Shared OLLAMA clients
+Agents pointing at the same server reuse one client so HTTP keep-alive connections are
+shared instead of every agent opening its own.
+"""
+
+from functools import lru_cache
+import ollama
+
+from ._ollama import DEFAULT_KEEP_ALIVE, OllamaGenerate
+
+
+@lru_cache(maxsize=32)
+def get_llm(
+    model: str,
+    base_url: str,
+    temperature: float,
+    keep_alive: str = DEFAULT_KEEP_ALIVE
+) -> OllamaGenerate:
+    """
+    Return a shared LangChain LLM for the given settings.
+
+    Args:
+        model: OLLAMA model name
+        base_url: OLLAMA API base URL
+        temperature: Sampling temperature
+        keep_alive: How long OLLAMA keeps the model loaded after a request
+
+    Returns:
+        LangChain LLM backed by the shared client for ``base_url``
+    """
+    return OllamaGenerate(
+        client=get_client(base_url),
+        model=model,
+        temperature=temperature,
+        keep_alive=keep_alive
+    )
+
+
+@lru_cache(maxsize=32)
+def get_client(base_url: str) -> ollama.Client:
+    """
+    Return a shared native OLLAMA client for a server.
+
+    The client wraps a pooled httpx connection and is safe to use from multiple threads.
+
+    Args:
+        base_url: OLLAMA API base URL
+
+    Returns:
+        OLLAMA client
+    """
+    return ollama.Client(host=base_url)
@@ -0,0 +1,195 @@
+"""
+Helpers around the native OLLAMA client
+Used where the agents need features LangChain's wrapper does not expose, such as keep_alive,
+bounded generation, and streaming with early termination.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import ollama
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+
+
+# Keep models loaded between calls instead of paying a multi-second reload
+DEFAULT_KEEP_ALIVE = "30m"
+
+# Bound generation so a misbehaving model cannot run until the context limit
+DEFAULT_OPTIONS: Dict[str, Any] = {
+    "num_predict": 512,
+    "num_ctx": 2048,
+    "stop": ["\n\n\n"]
+}
+
+
+class OllamaGenerate(LLM):
+    """
+    LangChain LLM backed by OLLAMA's /api/generate endpoint.
+
+    Unlike LangChain's own OLLAMA wrapper, this reuses a native client (and its pooled
+    HTTP connections) and always sends keep_alive and bounded generation options.
+    """
+
+    client: Any
+    model: str
+    temperature: float = 0.7
+    keep_alive: str = DEFAULT_KEEP_ALIVE
+    num_predict: int = DEFAULT_OPTIONS["num_predict"]
+    num_ctx: int = DEFAULT_OPTIONS["num_ctx"]
+    stop: Optional[List[str]] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "ollama-generate"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "num_predict": self.num_predict,
+            "num_ctx": self.num_ctx
+        }
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        response = self.client.generate(
+            model=self.model,
+            prompt=prompt,
+            keep_alive=self.keep_alive,
+            options={
+                "temperature": self.temperature,
+                "num_predict": self.num_predict,
+                "num_ctx": self.num_ctx,
+                "stop": stop or self.stop or DEFAULT_OPTIONS["stop"]
+            }
+        )
+        return response["response"]
+
+
+def warm_up(client: ollama.Client, model: str, keep_alive: str = DEFAULT_KEEP_ALIVE) -> None:
+    """
+    Load a model into memory ahead of the first real request.
+
+    An empty prompt makes OLLAMA load the model without generating anything, and
+    keep_alive pins it so later requests do not pay the load again.
+
+    Args:
+        client: OLLAMA client
+        model: Model name
+        keep_alive: How long OLLAMA keeps the model loaded
+    """
+    client.generate(model=model, prompt="", keep_alive=keep_alive)
+
+
+def stream_chat(
+    client: ollama.Client,
+    model: str,
+    prompt: str,
+    options: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    """
+    Stream a single-turn chat completion.
+
+    Closing the returned generator (e.g. breaking out of a loop over it) closes the
+    HTTP response, which makes OLLAMA stop generating.
+
+    Args:
+        client: OLLAMA client
+        model: Model name
+        prompt: User prompt
+        options: OLLAMA generation options, merged over DEFAULT_OPTIONS
+
+    Yields:
+        Content fragments as they are generated
+    """
+    stream = client.chat(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        stream=True,
+        keep_alive=DEFAULT_KEEP_ALIVE,
+        options={**DEFAULT_OPTIONS, **(options or {})}
+    )
+    try:
+        for chunk in stream:
+            content = chunk["message"]["content"]
+            if content:
+                yield content
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+
+
+def iter_lines(fragments: Iterable[str]) -> Iterator[str]:
+    """
+    Re-chunk streamed fragments into complete lines.
+
+    Args:
+        fragments: Text fragments, e.g. from stream_chat
+
+    Yields:
+        Each line (without its newline) as soon as it is complete, then any remainder
+    """
+    buffer = ""
+    try:
+        for fragment in fragments:
+            buffer += fragment
+            *lines, buffer = buffer.split("\n")
+            yield from lines
+    finally:
+        # Propagate early termination to the underlying stream
+        close = getattr(fragments, "close", None)
+        if close:
+            close()
+    if buffer:
+        yield buffer
+
+
+async def achat_many(
+    client: ollama.Client,
+    model: str,
+    prompts: List[str],
+    options: Optional[Dict[str, Any]] = None,
+    max_concurrency: int = 8
+) -> List[str]:
+    """
+    Answer independent single-turn prompts concurrently.
+
+    Requests go through the given (typically shared) client from worker threads, so
+    they reuse its pooled keep-alive connections across calls, and at most
+    ``max_concurrency`` are in flight at once so the server can batch them.
+
+    Args:
+        client: OLLAMA client (thread-safe)
+        model: Model name
+        prompts: User prompts
+        options: OLLAMA generation options, merged over DEFAULT_OPTIONS
+        max_concurrency: Maximum number of concurrent requests
+
+    Returns:
+        Responses, in prompt order
+    """
+    loop = asyncio.get_running_loop()
+    merged_options = {**DEFAULT_OPTIONS, **(options or {})}
+
+    def answer(prompt: str) -> str:
+        response = client.chat(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            keep_alive=DEFAULT_KEEP_ALIVE,
+            options=merged_options
+        )
+        return response["message"]["content"]
+
+    # A dedicated pool caps requests in flight, independent of the default executor's size
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return list(await asyncio.gather(
+            *(loop.run_in_executor(executor, answer, prompt) for prompt in prompts)
+        ))
@@ -3,14 +3,95 @@ AI Agent using OLLAMA and LangChain
 This module provides a flexible AI agent that can perform various tasks using local LLMs via OLLAMA.
 """
 
+import asyncio
+import json
 import os
 from typing import List, Dict, Optional, Any
-from langchain_community.llms import Ollama
+import ollama
 from langchain.agents import Tool, AgentExecutor, create_react_agent
 from langchain.prompts import PromptTemplate
-from langchain.memory import ConversationBufferMemory
+from langchain.memory import ConversationBufferWindowMemory
 from langchain.chains import LLMChain
 
+from utils.config import check_ollama_availability
+
+from ._client_pool import get_client, get_llm
+from ._ollama import OllamaGenerate, achat_many, stream_chat, warm_up
+from .semantic_cache import SemanticCache
+
+
+# Prompt templates are fixed, so they are built once at import
+_CHAT_PROMPT = PromptTemplate(
+    input_variables=["message", "chat_history"],
+    template="""You are a helpful AI assistant. Use the conversation history to provide context-aware responses.
+
+Chat History:
+{chat_history}
+
+Current Message: {message}
+
+Response:"""
+)
+
+_REASON_PROMPT = PromptTemplate(
+    input_variables=["task"],
+    template="""You are an AI agent capable of step-by-step reasoning. 
+Break down the following task and provide a detailed solution:
+
+Task: {task}
+
+Think through this step by step:
+1. First, analyze the task
+2. Break it into sub-problems
+3. Solve each sub-problem
+4. Combine the solutions
+
+Response:"""
+)
+
+_SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["text", "max_length"],
+    template="""Summarize the following text in approximately {max_length} words or less:
+
+Text: {text}
+
+Summary:"""
+)
+
+_SENTIMENT_PROMPT = PromptTemplate(
+    input_variables=["text"],
+    template="""Analyze the sentiment of the following text. 
+Respond with: POSITIVE, NEGATIVE, or NEUTRAL, followed by a brief explanation.
+
+Text: {text}
+
+Sentiment:"""
+)
+
+_EXTRACT_PROMPT = PromptTemplate(
+    input_variables=["text", "info_type"],
+    template="""Extract all {info_type} from the following text:
+
+Text: {text}
+
+Extracted {info_type}:"""
+)
+
+
+def _cache_context(
+    prompt: Optional[PromptTemplate],
+    inputs: Dict[str, Any],
+    text_variable: str
+) -> str:
+    """
+    Return the exact-match part of a semantic cache key.
+    
+    This is the template together with every input except the free text, so e.g.
+    extract_info(text, "names") and extract_info(text, "locations") never share an entry.
+    """
+    fixed = sorted((key, value) for key, value in inputs.items() if key != text_variable)
+    return json.dumps([prompt.template if prompt else None, fixed], default=str)
+
 
 class AIAgent:
     """
@@ -28,7 +109,12 @@ class AIAgent:
         model: str = "llama2",
         base_url: str = "http://localhost:11434",
         temperature: float = 0.7,
-        verbose: bool = False
+        verbose: bool = False,
+        cache: Optional[SemanticCache] = None,
+        quant: Optional[str] = None,
+        memory_window: int = 6,
+        client: Optional[ollama.Client] = None,
+        check_connection: bool = True
     ):
         """
         Initialize the AI Agent.
@@ -38,25 +124,73 @@ class AIAgent:
             base_url: OLLAMA API base URL
             temperature: Sampling temperature (0.0 to 1.0)
             verbose: Enable verbose logging
+            cache: Semantic prompt cache to short-circuit repeated prompts (optional;
+                chat() is never cached since its answers depend on the history)
+            quant: Quantization suffix appended to the model's tag (e.g., 'q4_K_M', 'q8_0'),
+                so 'llama2:7b-chat' becomes 'llama2:7b-chat-q4_K_M'. OLLAMA library tags
+                put the size and variant before the quantization, so ``model`` must
+                include an explicit tag. Quantized weights roughly halve memory use and
+                speed up decoding at some cost in accuracy, so this is opt-in.
+            memory_window: Number of recent conversation turns included in chat prompts
+            client: OLLAMA client to send requests through, e.g. one shared with other
+                agents (default: the shared client for ``base_url``)
+            check_connection: Verify that OLLAMA is reachable at ``base_url`` (the
+                result is cached per process once it succeeds)
+            
+        Raises:
+            ValueError: If ``quant`` is given for a model without an explicit tag
+            ConnectionError: If ``check_connection`` is set and OLLAMA is not reachable
         """
+        if quant and ":" not in model:
+            raise ValueError(
+                f"quant requires a model with an explicit tag, e.g. '{model}:7b-chat'; "
+                f"OLLAMA library tags like '{model}:{quant}' usually do not exist"
+            )
+        
+        if check_connection and not check_ollama_availability(base_url):
+            raise ConnectionError(
+                f"OLLAMA service not detected at {base_url}. "
+                "Please make sure OLLAMA is installed and running: https://ollama.ai/"
+            )
+        
+        if quant:
+            # 'llama2:7b-chat' -> 'llama2:7b-chat-q4_K_M', 'qwen3-vl:2b' -> 'qwen3-vl:2b-q4_K_M'
+            model = f"{model}-{quant}"
+        
         self.model = model
         self.base_url = base_url
         self.temperature = temperature
         self.verbose = verbose
+        self.cache = cache
         
-        # Initialize OLLAMA LLM
-        self.llm = Ollama(
-            model=model,
-            base_url=base_url,
-            temperature=temperature
-        )
+        # Native OLLAMA client for streamed and concurrent completions
+        self.client = client or get_client(base_url)
         
-        # Initialize conversation memory
-        self.memory = ConversationBufferMemory(
+        # Initialize OLLAMA LLM on the same client
+        if client is None:
+            self.llm = get_llm(model, base_url, temperature)
+        else:
+            self.llm = OllamaGenerate(client=client, model=model, temperature=temperature)
+        
+        # Initialize conversation memory. Only the last few turns are kept so the
+        # prompt (and OLLAMA's prefill cost) stays bounded over long sessions.
+        self.memory = ConversationBufferWindowMemory(
+            k=memory_window,
             memory_key="chat_history",
             return_messages=True
         )
         
+        # Build chains once; LangChain validates templates and binds memory on construction
+        self._chat_chain = LLMChain(
+            llm=self.llm,
+            prompt=_CHAT_PROMPT,
+            memory=self.memory,
+            verbose=verbose
+        )
+        self._reason_chain = LLMChain(llm=self.llm, prompt=_REASON_PROMPT, verbose=verbose)
+        self._summary_chain = LLMChain(llm=self.llm, prompt=_SUMMARY_PROMPT, verbose=verbose)
+        self._extract_chain = LLMChain(llm=self.llm, prompt=_EXTRACT_PROMPT, verbose=verbose)
+        
         # Custom tools for the agent
         self.tools: List[Tool] = []
         
@@ -75,6 +209,57 @@ class AIAgent:
             description=description
         )
         self.tools.append(tool)
+    
+    def _predict(self, chain: LLMChain, text_variable: str, **inputs) -> str:
+        """
+        Run a stateless chain, answering from the semantic cache when possible.
+        
+        Only the free-text input is compared semantically; the template and all other
+        inputs must match exactly (see _cache_context).
+        
+        Args:
+            chain: Chain to run (must not have memory)
+            text_variable: Name of the free-text input
+            **inputs: Chain input variables
+            
+        Returns:
+            Raw chain response
+        """
+        if self.cache is None:
+            return chain.predict(**inputs)
+        
+        return self.cache.get_or_compute(
+            inputs[text_variable],
+            lambda: chain.predict(**inputs),
+            context=_cache_context(chain.prompt, inputs, text_variable)
+        )
+    
+    def _stream(self, prompt: PromptTemplate, text_variable: str, **inputs) -> str:
+        """
+        Stream a completion for a formatted prompt, answering from the semantic cache when possible.
+        
+        Args:
+            prompt: Prompt template
+            text_variable: Name of the free-text template variable
+            **inputs: Template variables
+            
+        Returns:
+            Raw response
+        """
+        prompt_text = prompt.format(**inputs)
+        
+        def generate() -> str:
+            return "".join(stream_chat(
+                self.client, self.model, prompt_text, {"temperature": self.temperature}
+            ))
+        
+        if self.cache is None:
+            return generate()
+        return self.cache.get_or_compute(
+            inputs[text_variable],
+            generate,
+            context=_cache_context(prompt, inputs, text_variable)
+        )
         
     def chat(self, message: str) -> str:
         """
@@ -86,27 +271,67 @@ class AIAgent:
         Returns:
             Agent response
         """
-        prompt = PromptTemplate(
-            input_variables=["message", "chat_history"],
-            template="""You are a helpful AI assistant. Use the conversation history to provide context-aware responses.
-
-Chat History:
-{chat_history}
-
-Current Message: {message}
-
-Response:"""
-        )
+        # Answers depend on the whole conversation, so chat bypasses the semantic cache
+        response = self._chat_chain.predict(message=message)
+        return response.strip()
+    
+    def _answer_many(
+        self,
+        prompt: Optional[PromptTemplate],
+        inputs: List[Dict[str, Any]],
+        text_variable: str,
+        max_concurrency: int
+    ) -> List[str]:
+        """
+        Answer independent prompts concurrently, using the semantic cache when possible.
         
-        chain = LLMChain(
-            llm=self.llm,
-            prompt=prompt,
-            memory=self.memory,
-            verbose=self.verbose
-        )
+        Args:
+            prompt: Prompt template, or None to send each free text as the prompt
+            inputs: Template variables of each prompt
+            text_variable: Name of the free-text variable
+            max_concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            Stripped responses, in input order
+        """
+        texts = [variables[text_variable] for variables in inputs]
+        contexts = [_cache_context(prompt, variables, text_variable) for variables in inputs]
+        responses: List[Optional[str]] = [None] * len(inputs)
+        if self.cache is not None:
+            responses = [self.cache.get(text, context) for text, context in zip(texts, contexts)]
         
-        response = chain.predict(message=message)
-        return response.strip()
+        misses = [i for i, response in enumerate(responses) if response is None]
+        if misses:
+            answers = asyncio.run(achat_many(
+                self.client,
+                self.model,
+                [prompt.format(**inputs[i]) if prompt else texts[i] for i in misses],
+                {"temperature": self.temperature},
+                max_concurrency
+            ))
+            for i, answer in zip(misses, answers):
+                responses[i] = answer
+                if self.cache is not None:
+                    self.cache.put(texts[i], answer, contexts[i])
+        
+        return [response.strip() for response in responses]
+    
+    def chat_many(self, prompts: List[str], max_concurrency: int = 8) -> List[str]:
+        """
+        Send several independent prompts to the AI agent concurrently.
+        
+        Unlike chat(), prompts are answered without conversation history and do not
+        add to it. Must not be called from inside a running event loop.
+        
+        Args:
+            prompts: User messages
+            max_concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            Agent responses, in prompt order
+        """
+        inputs = [{"message": prompt} for prompt in prompts]
+        return self._answer_many(None, inputs, "message", max_concurrency)
     
     def reason(self, task: str) -> str:
         """
@@ -118,24 +343,7 @@ Response:"""
         Returns:
             Reasoning result
         """
-        prompt = PromptTemplate(
-            input_variables=["task"],
-            template="""You are an AI agent capable of step-by-step reasoning. 
-Break down the following task and provide a detailed solution:
-
-Task: {task}
-
-Think through this step by step:
-1. First, analyze the task
-2. Break it into sub-problems
-3. Solve each sub-problem
-4. Combine the solutions
-
-Response:"""
-        )
-        
-        chain = LLMChain(llm=self.llm, prompt=prompt, verbose=self.verbose)
-        response = chain.predict(task=task)
+        response = self._predict(self._reason_chain, "task", task=task)
         return response.strip()
     
     def summarize(self, text: str, max_length: int = 200) -> str:
@@ -149,19 +357,31 @@ Response:"""
         Returns:
             Summary
         """
-        prompt = PromptTemplate(
-            input_variables=["text", "max_length"],
-            template="""Summarize the following text in approximately {max_length} words or less:
-
-Text: {text}
-
-Summary:"""
-        )
-        
-        chain = LLMChain(llm=self.llm, prompt=prompt, verbose=self.verbose)
-        response = chain.predict(text=text, max_length=max_length)
+        response = self._predict(self._summary_chain, "text", text=text, max_length=max_length)
         return response.strip()
     
+    def summarize_many(
+        self,
+        texts: List[str],
+        max_length: int = 200,
+        max_concurrency: int = 8
+    ) -> List[str]:
+        """
+        Summarize several texts concurrently.
+        
+        Must not be called from inside a running event loop.
+        
+        Args:
+            texts: Texts to summarize
+            max_length: Maximum summary length
+            max_concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            Summaries, in input order
+        """
+        inputs = [{"text": text, "max_length": max_length} for text in texts]
+        return self._answer_many(_SUMMARY_PROMPT, inputs, "text", max_concurrency)
+    
     def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """
         Analyze the sentiment of a given text.
@@ -172,18 +392,7 @@ Summary:"""
         Returns:
             Sentiment analysis result
         """
-        prompt = PromptTemplate(
-            input_variables=["text"],
-            template="""Analyze the sentiment of the following text. 
-Respond with: POSITIVE, NEGATIVE, or NEUTRAL, followed by a brief explanation.
-
-Text: {text}
-
-Sentiment:"""
-        )
-        
-        chain = LLMChain(llm=self.llm, prompt=prompt, verbose=self.verbose)
-        response = chain.predict(text=text)
+        response = self._stream(_SENTIMENT_PROMPT, "text", text=text)
         
         lines = response.strip().split('\n')
         sentiment = lines[0].strip().upper()
@@ -206,19 +415,13 @@ Sentiment:"""
         Returns:
             Extracted information
         """
-        prompt = PromptTemplate(
-            input_variables=["text", "info_type"],
-            template="""Extract all {info_type} from the following text:
-
-Text: {text}
-
-Extracted {info_type}:"""
-        )
-        
-        chain = LLMChain(llm=self.llm, prompt=prompt, verbose=self.verbose)
-        response = chain.predict(text=text, info_type=info_type)
+        response = self._predict(self._extract_chain, "text", text=text, info_type=info_type)
         return response.strip()
     
+    def warm_up(self):
+        """Load the model on the OLLAMA server so the first request does not wait for it."""
+        warm_up(self.client, self.model)
+    
     def clear_memory(self):
         """Clear conversation history."""
         self.memory.clear()
@@ -0,0 +1,91 @@
+"""
+Adaptive Batching Utilities for Vision Models
+This module groups images of similar resolution so they can be sent to a vision model
+as one batch with minimal padding.
+"""
+
+from typing import List, Tuple
+from PIL import Image
+
+
+class AdaptiveBatchCollator:
+    """
+    Groups images into size buckets and pads each bucket to a common shape.
+
+    Images are sorted by area and a new bucket starts whenever the area jumps by more
+    than ``size_threshold`` relative to the previous image. Padding is then applied per
+    bucket (to the bucket's largest width and height) rather than to a global maximum,
+    which keeps the number of wasted pixels small.
+    """
+
+    def __init__(self, size_threshold: float = 0.2, fill: int = 255):
+        """
+        Initialize the collator.
+
+        Args:
+            size_threshold: Relative area increase that starts a new bucket
+            fill: Gray level used for padding (default: white)
+        """
+        self.size_threshold = size_threshold
+        self.fill = fill
+
+    def group_by_size(self, images: List[Image.Image]) -> List[List[int]]:
+        """
+        Bucket images by resolution.
+
+        Args:
+            images: PIL images (only their sizes are read)
+
+        Returns:
+            Buckets of indices into ``images``, smallest images first
+        """
+        order = sorted(range(len(images)), key=lambda i: images[i].width * images[i].height)
+
+        buckets: List[List[int]] = []
+        previous_area = None
+        for index in order:
+            area = images[index].width * images[index].height
+            if previous_area is None or area > previous_area * (1 + self.size_threshold):
+                buckets.append([])
+            buckets[-1].append(index)
+            previous_area = area
+
+        return buckets
+
+    def bucket_shape(self, images: List[Image.Image]) -> Tuple[int, int]:
+        """Return the (width, height) every image in a bucket is padded to."""
+        return (
+            max(image.width for image in images),
+            max(image.height for image in images)
+        )
+
+    def pad_to(self, image: Image.Image, shape: Tuple[int, int]) -> Image.Image:
+        """
+        Pad a single image to the given (width, height).
+
+        Args:
+            image: Image no larger than ``shape``
+            shape: Target (width, height)
+
+        Returns:
+            Padded RGB image, content anchored at the top-left corner
+        """
+        image = image.convert("RGB")
+        if image.size != shape:
+            canvas = Image.new("RGB", shape, (self.fill,) * 3)
+            canvas.paste(image, (0, 0))
+            image = canvas
+        return image
+
+    def dynamic_padding(self, images: List[Image.Image]) -> List[Image.Image]:
+        """
+        Pad a bucket of images to the bucket's maximum width and height.
+
+        Args:
+            images: Images belonging to one bucket
+
+        Returns:
+            Padded RGB images, content anchored at the top-left corner
+        """
+        shape = self.bucket_shape(images)
+        return [self.pad_to(image, shape) for image in images]
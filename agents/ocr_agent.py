@@ -3,16 +3,311 @@ OCR Agent using OLLAMA and LangChain with Vision Capabilities
 This module provides OCR functionality combined with AI analysis using OLLAMA.
 """
 
+import base64
+import hashlib
+import io
+import json
+import math
+import mmap
+import multiprocessing
 import os
-from typing import List, Dict, Optional, Any, Union
+import queue
+import re
+import tempfile
+import threading
+from typing import List, Dict, Iterator, Optional, Any, Tuple, Union
+from collections import OrderedDict
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 import pytesseract
 from PIL import Image
 import cv2
 import numpy as np
-from langchain_community.llms import Ollama
+import ollama
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+
+from ._client_pool import get_client
+from ._ollama import (
+    DEFAULT_KEEP_ALIVE,
+    DEFAULT_OPTIONS,
+    iter_lines,
+    stream_chat,
+    warm_up
+)
+from .batching import AdaptiveBatchCollator
+
+try:
+    import tesserocr  # Optional: in-process libtesseract bindings
+except ImportError:
+    tesserocr = None
+
+
+# Separator the vision model is asked to emit between per-image transcriptions
+_IMAGE_MARKER_RE = re.compile(r'^\s*=+\s*IMAGE\s+(\d+)\s*=+\s*$', re.MULTILINE | re.IGNORECASE)
+
+# Base64 encodings of original image files by (path, mtime_ns), least recently used
+# first, bounded in total size so large photos cannot pin memory for the process lifetime
+_ENCODED_FILES: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+_ENCODED_FILES_MAX_BYTES = 64 * 1024 * 1024
+_ENCODED_FILES_LOCK = threading.Lock()
+_encoded_files_size = 0
+
+# Smallest share of a batch worth starting an OCR worker process for
+_MIN_IMAGES_PER_PROCESS = 4
+
+# Documents with fewer recognized words than this are not sent for AI analysis
+_MIN_ANALYSIS_WORDS = 3
+
+# "Field: value" lines in structured-extraction responses
+_FIELD_RE = re.compile(r'^\s*([^:\n]+?)\s*:\s*(.*?)\s*$', re.MULTILINE)
+
+# "Doc N -> Field: value" lines in batched structured-extraction responses
+_DOC_LINE_RE = re.compile(r'^\s*Doc(?:ument)?\s*(\d+)\s*->\s*(.*)$', re.IGNORECASE)
+
+# Prompt templates are fixed, so they are built once at import
+_ANALYSIS_PROMPTS = {
+    "summary": PromptTemplate(
+        input_variables=["text"],
+        template="""Provide a concise summary of the following text:
+
+Text: {text}
+
+Summary:"""
+    ),
+    "key_points": PromptTemplate(
+        input_variables=["text"],
+        template="""Extract the key points from the following text:
+
+Text: {text}
+
+Key Points:"""
+    ),
+    "entities": PromptTemplate(
+        input_variables=["text"],
+        template="""Extract named entities (people, organizations, locations, dates) from the following text:
+
+Text: {text}
+
+Entities:"""
+    ),
+    "classification": PromptTemplate(
+        input_variables=["text"],
+        template="""Classify the type of document this text is from (e.g., invoice, letter, form, receipt):
+
+Text: {text}
+
+Document Type:"""
+    )
+}
+
+# What each analysis type asks for when several are fused into one request
+_ANALYSIS_TASKS = {
+    "summary": "a concise summary of the text",
+    "key_points": "the key points of the text",
+    "entities": "named entities (people, organizations, locations, dates) in the text",
+    "classification": "the type of document the text is from (e.g., invoice, letter, form, receipt)"
+}
+
+_MULTI_ANALYSIS_PROMPT = PromptTemplate(
+    input_variables=["text", "tasks"],
+    template="""Analyze the text below. Return a JSON object with exactly these keys, each
+holding a plain-text answer:
+{tasks}
+
+Text: {text}"""
+)
+
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+_STRUCTURED_PROMPT = PromptTemplate(
+    input_variables=["text", "fields"],
+    template="""Extract the requested fields from the text below.
+Respond with one line per field in the format:
+Field1: value1
+Field2: value2
+
+Fields: {fields}
+
+Text: {text}
+
+Extracted Data:"""
+)
+
+_STRUCTURED_BATCH_PROMPT = PromptTemplate(
+    input_variables=["documents", "fields"],
+    template="""Extract the requested fields from each of the documents below.
+Respond with one line per field per document in the format:
+Doc 1 -> Field1: value1
+Doc 1 -> Field2: value2
+Doc 2 -> Field1: value1
+
+Fields: {fields}
+
+{documents}
+
+Extracted Data:"""
+)
+
+
+@lru_cache(maxsize=16)
+def _structured_prompt(fields: tuple) -> PromptTemplate:
+    """Return the structured-extraction prompt with a field list already filled in."""
+    return _STRUCTURED_PROMPT.partial(fields=", ".join(fields))
+
+
+def _imread_mmap(path: str, flags: int = cv2.IMREAD_COLOR) -> Optional[np.ndarray]:
+    """
+    Decode an image file through a read-only memory map.
+    
+    The OS pages the file in on demand and shares the mapping between threads reading
+    the same file. Returns None when the file cannot be read, like cv2.imread.
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            buffer = np.frombuffer(mm, dtype=np.uint8)
+            img = cv2.imdecode(buffer, flags)
+            # The mapping cannot be closed while an array still exports it
+            del buffer
+    except (OSError, ValueError):
+        return None
+    
+    return img
+
+
+def _is_clean_image(gray: np.ndarray) -> bool:
+    """
+    Detect digital-origin renders (e.g. PDF exports) that need no denoising or thresholding.
+    
+    Such images have strong contrast, few distinct gray levels, and a flat border;
+    binarizing them only destroys the antialiasing Tesseract benefits from.
+    """
+    if gray.std() <= 40:
+        return False
+    
+    # Distinct intensity levels, counted in O(N) via a histogram instead of np.unique
+    if np.count_nonzero(np.bincount(gray.ravel(), minlength=256)) >= 50:
+        return False
+    
+    margin = max(1, min(gray.shape[:2]) // 50)
+    border = np.concatenate([
+        gray[:margin].ravel(), gray[-margin:].ravel(),
+        gray[:, :margin].ravel(), gray[:, -margin:].ravel()
+    ])
+    return border.var() < 25
+
+
+def _enhance_image(
+    gray: np.ndarray,
+    enhance: bool,
+    enhance_level: str,
+    target_max_dim: Optional[int],
+    auto_skip: bool
+) -> np.ndarray:
+    """Downscale an oversize grayscale scan and optionally denoise and binarize it."""
+    # Shrink oversize scans (~300 DPI is plenty for Tesseract) before any filter runs
+    if target_max_dim:
+        scale = min(1.0, target_max_dim / max(gray.shape[:2]))
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
+    if enhance and auto_skip and _is_clean_image(gray):
+        return gray
+    
+    if enhance:
+        # Apply denoising; a 3x3 median is enough ahead of thresholding
+        if enhance_level == "quality":
+            denoised = cv2.fastNlMeansDenoising(
+                gray, h=7, templateWindowSize=7, searchWindowSize=21
+            )
+        else:
+            denoised = cv2.medianBlur(gray, 3)
+        
+        # Apply adaptive thresholding
+        processed = cv2.adaptiveThreshold(
+            denoised,
+            255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY,
+            11,
+            2
+        )
+    else:
+        processed = gray
+    
+    return processed
+
+
+@lru_cache(maxsize=256)
+def _preprocess_file_cached(
+    path: str,
+    mtime_ns: int,
+    enhance: bool,
+    enhance_level: str,
+    target_max_dim: Optional[int],
+    auto_skip: bool,
+    cache_dir: Optional[str]
+) -> bytes:
+    """
+    Preprocess an image file to PNG bytes, memoized in memory and optionally on disk.
+    
+    The modification time is part of the key, so edited files are reprocessed. Entries
+    are stored PNG-encoded rather than as raw arrays, a fraction of the size for the
+    binarized output, so 256 of them stay affordable.
+    """
+    disk_path = None
+    if cache_dir:
+        key = hashlib.sha1(
+            f"{path}|{mtime_ns}|{enhance}|{enhance_level}|{target_max_dim}|{auto_skip}".encode()
+        ).hexdigest()
+        disk_path = Path(cache_dir) / f"{key}.png"
+        try:
+            return disk_path.read_bytes()
+        except OSError:
+            pass
+    
+    gray = _imread_mmap(path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError("Failed to load image")
+    processed = _enhance_image(gray, enhance, enhance_level, target_max_dim, auto_skip)
+    png = cv2.imencode(".png", processed, [cv2.IMWRITE_PNG_COMPRESSION, 1])[1].tobytes()
+    if disk_path is not None:
+        disk_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a concurrent or interrupted run never leaves a partial file
+        tmp_path = disk_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(png)
+        os.replace(tmp_path, disk_path)
+    
+    return png
+
+
+def _encode_image_file(path: str, mtime_ns: int) -> str:
+    """
+    Read and base64-encode an image file, reusing the encoding of unchanged files.
+    
+    The most recently used encodings are kept up to _ENCODED_FILES_MAX_BYTES in total;
+    files bigger than a quarter of that are encoded on every call instead.
+    """
+    global _encoded_files_size
+    key = (path, mtime_ns)
+    with _ENCODED_FILES_LOCK:
+        encoded = _ENCODED_FILES.get(key)
+        if encoded is not None:
+            _ENCODED_FILES.move_to_end(key)
+            return encoded
+    
+    encoded = base64.b64encode(Path(path).read_bytes()).decode()
+    if len(encoded) <= _ENCODED_FILES_MAX_BYTES // 4:
+        with _ENCODED_FILES_LOCK:
+            if key not in _ENCODED_FILES:
+                _ENCODED_FILES[key] = encoded
+                _encoded_files_size += len(encoded)
+                while _encoded_files_size > _ENCODED_FILES_MAX_BYTES:
+                    _, evicted = _ENCODED_FILES.popitem(last=False)
+                    _encoded_files_size -= len(evicted)
+    
+    return encoded
 
 
 class OCRAgent:
@@ -33,7 +328,11 @@ class OCRAgent:
         base_url: str = "http://localhost:11434",
         tesseract_path: Optional[str] = None,
         language: str = "eng",
-        verbose: bool = False
+        verbose: bool = False,
+        cache_dir: Optional[str] = None,
+        target_max_dim: Optional[int] = 2400,
+        min_analysis_confidence: float = 50.0,
+        client: Optional[ollama.Client] = None
     ):
         """
         Initialize the OCR Agent.
@@ -43,28 +342,112 @@ class OCRAgent:
             base_url: OLLAMA API base URL
             tesseract_path: Path to Tesseract executable (optional)
             language: OCR language code (default: 'eng')
-            verbose: Enable verbose logging
+            verbose: Print each prompt before it is sent to OLLAMA
+            cache_dir: Directory for preprocessed images, e.g. '~/.cache/ocr_agent'
+                (optional; preprocessed files are always cached in memory)
+            target_max_dim: Longest side, in pixels, that images are downscaled to before
+                preprocessing (None disables downscaling)
+            min_analysis_confidence: Minimum average OCR confidence (0-100) for
+                process_document to run AI analysis on the extracted text
+            client: OLLAMA client to send requests through, e.g. one shared with other
+                agents (default: the shared client for ``base_url``)
         """
         self.model = model
         self.base_url = base_url
         self.language = language
         self.verbose = verbose
+        self.cache_dir = os.path.expanduser(cache_dir) if cache_dir else None
+        self.target_max_dim = target_max_dim
+        self.min_analysis_confidence = min_analysis_confidence
         
         # Set Tesseract path if provided
         if tesseract_path:
             pytesseract.pytesseract.tesseract_cmd = tesseract_path
         
-        # Initialize OLLAMA LLM for text analysis
-        self.llm = Ollama(
-            model=model,
-            base_url=base_url,
-            temperature=0.3  # Lower temperature for more consistent analysis
-        )
+        # Native OLLAMA client for all analysis and vision requests
+        self.client = client or get_client(base_url)
+        
+        # Prefer in-process Tesseract over a pytesseract subprocess per call.
+        # A PyTessBaseAPI is not thread-safe, so threads check engines out of a pool.
+        # The pool grows on demand up to one engine per core, since Tesseract is
+        # CPU-bound and every engine holds its own copy of the language model.
+        self._tess_pool: "queue.Queue[Any]" = queue.Queue()
+        self._tess_apis: List[Any] = []
+        self._tess_lock = threading.Lock()
+        self._tess_max = os.cpu_count() or 1
+        self.use_tesserocr = False
+        if tesserocr is not None:
+            try:
+                self._tess_pool.put(self._checkout_tess_api())
+                self.use_tesserocr = True
+            except Exception:
+                pass  # e.g. missing traineddata; fall back to pytesseract
+    
+    def _checkout_tess_api(self):
+        """Take a tesserocr API from the pool, creating one while under the pool limit."""
+        try:
+            return self._tess_pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._tess_lock:
+            if len(self._tess_apis) < self._tess_max:
+                api = tesserocr.PyTessBaseAPI(lang=self.language)
+                self._tess_apis.append(api)
+                return api
+        
+        # Every engine is in use; wait for one to be returned
+        return self._tess_pool.get()
+    
+    @contextmanager
+    def _tess_image(
+        self,
+        image: Union[str, np.ndarray, Image.Image],
+        preprocess: bool
+    ) -> Iterator[Any]:
+        """
+        Check out a tesserocr API with an input loaded, for the caller's exclusive use.
+        
+        Unpreprocessed files are read by Leptonica directly, skipping the Python-side
+        decode and copy. Other inputs are prepared before an API is checked out.
+        """
+        source = image
+        if not (isinstance(image, str) and not preprocess):
+            source = Image.fromarray(self._prepare_image(image, preprocess))
+        
+        api = self._checkout_tess_api()
+        try:
+            if isinstance(source, str):
+                try:
+                    api.SetImageFile(source)
+                except RuntimeError:
+                    raise ValueError("Failed to load image")
+            else:
+                api.SetImage(source)
+            yield api
+        finally:
+            self._tess_pool.put(api)
+    
+    def __del__(self):
+        """Release the native Tesseract instances."""
+        for api in getattr(self, "_tess_apis", []):
+            try:
+                api.End()
+            except Exception:
+                pass
+    
+    def _log_prompt(self, prompt: str) -> str:
+        """Print a prompt when verbose and return it unchanged."""
+        if self.verbose:
+            print(f"Prompt after formatting:\n{prompt}")
+        return prompt
         
     def preprocess_image(
         self,
         image: Union[str, np.ndarray, Image.Image],
-        enhance: bool = True
+        enhance: bool = True,
+        enhance_level: str = "fast",
+        auto_skip: bool = True
     ) -> np.ndarray:
         """
         Preprocess image to improve OCR accuracy.
@@ -72,41 +455,67 @@ class OCRAgent:
         Args:
             image: Image path, numpy array, or PIL Image
             enhance: Apply enhancement techniques
+            enhance_level: Denoising strength, 'fast' (median filter) or
+                'quality' (non-local means, much slower on large scans)
+            auto_skip: Skip enhancement for images that are already clean
+                digital renders, where thresholding degrades OCR
             
         Returns:
             Preprocessed image as numpy array
         """
-        # Load image if path is provided
+        # File inputs go through the memory/disk cache, keyed on modification time
+        if isinstance(image, str):
+            try:
+                mtime_ns = os.stat(image).st_mtime_ns
+            except OSError:
+                raise ValueError("Failed to load image")
+            png = _preprocess_file_cached(
+                os.path.abspath(image),
+                mtime_ns,
+                enhance,
+                enhance_level,
+                self.target_max_dim,
+                auto_skip,
+                self.cache_dir
+            )
+            return cv2.imdecode(np.frombuffer(png, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        
+        return _enhance_image(
+            self._to_gray(image), enhance, enhance_level, self.target_max_dim, auto_skip
+        )
+    
+    def _to_gray(self, image: Union[str, np.ndarray, Image.Image]) -> np.ndarray:
+        """
+        Decode an image path, PIL Image, or BGR(A)/grayscale array into a grayscale array.
+        
+        Files and PIL images are converted to grayscale while decoding, so no full-size
+        color copy is ever made.
+        """
         if isinstance(image, str):
-            img = cv2.imread(image)
+            img = _imread_mmap(image, cv2.IMREAD_GRAYSCALE)
         elif isinstance(image, Image.Image):
-            img = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+            img = np.asarray(image.convert("L"))
+        elif image is not None and image.ndim == 3:
+            code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            img = cv2.cvtColor(image, code)
         else:
             img = image
         
         if img is None:
             raise ValueError("Failed to load image")
         
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        if enhance:
-            # Apply denoising
-            denoised = cv2.fastNlMeansDenoising(gray)
-            
-            # Apply adaptive thresholding
-            processed = cv2.adaptiveThreshold(
-                denoised,
-                255,
-                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY,
-                11,
-                2
-            )
-        else:
-            processed = gray
+        return img
+    
+    def _prepare_image(
+        self,
+        image: Union[str, np.ndarray, Image.Image],
+        preprocess: bool
+    ) -> np.ndarray:
+        """Decode an input exactly once and return the grayscale image to run OCR on."""
+        if preprocess:
+            return self.preprocess_image(image)
         
-        return processed
+        return self._to_gray(image)
     
     def extract_text(
         self,
@@ -125,19 +534,13 @@ class OCRAgent:
         Returns:
             Extracted text
         """
-        if preprocess:
-            processed_img = self.preprocess_image(image)
-        else:
-            if isinstance(image, str):
-                processed_img = cv2.imread(image)
-            elif isinstance(image, Image.Image):
-                processed_img = np.array(image)
-            else:
-                processed_img = image
+        # Perform OCR (custom configs are only understood by the tesseract CLI)
+        if self.use_tesserocr and not config:
+            with self._tess_image(image, preprocess) as api:
+                return api.GetUTF8Text().strip()
         
-        # Perform OCR
         text = pytesseract.image_to_string(
-            processed_img,
+            self._prepare_image(image, preprocess),
             lang=self.language,
             config=config
         )
@@ -159,89 +562,127 @@ class OCRAgent:
         Returns:
             Dictionary with text and confidence data
         """
-        if preprocess:
-            processed_img = self.preprocess_image(image)
-        else:
-            if isinstance(image, str):
-                processed_img = cv2.imread(image)
-            elif isinstance(image, Image.Image):
-                processed_img = np.array(image)
-            else:
-                processed_img = image
-        
         # Get detailed OCR data
-        data = pytesseract.image_to_data(
-            processed_img,
-            lang=self.language,
-            output_type=pytesseract.Output.DICT
-        )
-        
-        # Extract text with confidence
-        text_parts = []
-        confidences = []
+        if self.use_tesserocr:
+            with self._tess_image(image, preprocess) as api:
+                api.Recognize()
+                words = api.MapWordConfidences()
+            data = {
+                "text": [word for word, _ in words],
+                "conf": [conf for _, conf in words]
+            }
+        else:
+            data = pytesseract.image_to_data(
+                self._prepare_image(image, preprocess),
+                lang=self.language,
+                output_type=pytesseract.Output.DICT
+            )
         
-        for i, conf in enumerate(data['conf']):
-            if int(conf) > 0:  # Only include recognized text
-                text_parts.append(data['text'][i])
-                confidences.append(int(conf))
+        # Extract text with confidence; only positive confidences are recognized text
+        conf = np.asarray(data['conf'], dtype=np.float64).astype(np.int32)
+        texts = np.asarray(data['text'], dtype=object)
+        mask = conf > 0
         
-        full_text = ' '.join(text_parts)
-        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+        full_text = ' '.join(texts[mask].tolist())
+        avg_confidence = float(conf[mask].mean()) if mask.any() else 0
         
         return {
             "text": full_text.strip(),
             "confidence": avg_confidence,
-            "word_count": len(text_parts),
+            "word_count": int(mask.sum()),
             "details": data
         }
     
-    def analyze_extracted_text(self, text: str, analysis_type: str = "summary") -> str:
+    def analyze_extracted_text(
+        self,
+        text: str,
+        analysis_type: str = "summary",
+        stream: bool = False
+    ) -> Union[str, Iterator[str]]:
         """
         Analyze extracted text using OLLAMA AI.
         
         Args:
             text: Extracted text to analyze
             analysis_type: Type of analysis ('summary', 'key_points', 'entities', 'classification')
+            stream: Return the response as it is generated instead of waiting for it
             
         Returns:
-            Analysis result
+            Analysis result, or with ``stream`` a generator of text fragments; closing
+            the generator early stops generation on the server
         """
-        templates = {
-            "summary": """Provide a concise summary of the following text:
-
-Text: {text}
-
-Summary:""",
-            "key_points": """Extract the key points from the following text:
-
-Text: {text}
-
-Key Points:""",
-            "entities": """Extract named entities (people, organizations, locations, dates) from the following text:
-
-Text: {text}
-
-Entities:""",
-            "classification": """Classify the type of document this text is from (e.g., invoice, letter, form, receipt):
-
-Text: {text}
-
-Document Type:"""
-        }
+        template = _ANALYSIS_PROMPTS.get(analysis_type, _ANALYSIS_PROMPTS["summary"])
+        prompt = self._log_prompt(template.format(text=text))
+        fragments = stream_chat(self.client, self.model, prompt, {"temperature": 0.3})
+        if stream:
+            return fragments
         
-        template = templates.get(analysis_type, templates["summary"])
-        prompt = PromptTemplate(input_variables=["text"], template=template)
+        return "".join(fragments).strip()
+    
+    def analyze_multi(self, text: str, tasks: List[str]) -> Dict[str, str]:
+        """
+        Run several analyses of the same text in a single OLLAMA request.
+        
+        One round trip and one prompt prefill replace a call per analysis type.
+        
+        Args:
+            text: Extracted text to analyze
+            tasks: Analysis types ('summary', 'key_points', 'entities', 'classification')
+            
+        Returns:
+            Dictionary mapping each task to its result ('' if the model omitted it)
+        """
+        task_lines = "\n".join(
+            f'- "{task}": {_ANALYSIS_TASKS.get(task, task.replace("_", " "))}'
+            for task in tasks
+        )
+        response = self.client.chat(
+            model=self.model,
+            messages=[{
+                "role": "user",
+                "content": self._log_prompt(
+                    _MULTI_ANALYSIS_PROMPT.format(text=text, tasks=task_lines)
+                )
+            }],
+            format="json",
+            keep_alive=DEFAULT_KEEP_ALIVE,
+            options={
+                **DEFAULT_OPTIONS,
+                "temperature": 0.3,
+                "num_predict": max(DEFAULT_OPTIONS["num_predict"], 256 * len(tasks))
+            }
+        )
+        content = response["message"]["content"]
         
-        chain = LLMChain(llm=self.llm, prompt=prompt, verbose=self.verbose)
-        response = chain.predict(text=text)
+        try:
+            parsed = json.loads(content)
+        except json.JSONDecodeError:
+            # Tolerate prose around the object
+            match = _JSON_OBJECT_RE.search(content)
+            try:
+                parsed = json.loads(match.group(0)) if match else {}
+            except json.JSONDecodeError:
+                parsed = {}
+        if not isinstance(parsed, dict):
+            parsed = {}
         
-        return response.strip()
+        results = {}
+        for task in tasks:
+            value = parsed.get(task, "")
+            if isinstance(value, list):
+                value = "\n".join(f"- {item}" for item in value)
+            elif not isinstance(value, str):
+                value = json.dumps(value)
+            results[task] = value.strip()
+        
+        return results
     
     def process_document(
         self,
         image_path: str,
         analyze: bool = True,
-        analysis_type: str = "summary"
+        analysis_type: str = "summary",
+        preprocess: bool = True
     ) -> Dict[str, Any]:
         """
         Complete document processing pipeline.
@@ -250,13 +691,24 @@ Document Type:"""
             image_path: Path to image file
             analyze: Perform AI analysis on extracted text
             analysis_type: Type of analysis to perform
+            preprocess: Apply preprocessing before OCR
             
         Returns:
             Complete processing result
         """
         # Extract text with confidence
-        ocr_result = self.extract_text_with_confidence(image_path)
+        ocr_result = self.extract_text_with_confidence(image_path, preprocess)
         
+        return self._build_result(image_path, ocr_result, analyze, analysis_type)
+    
+    def _build_result(
+        self,
+        image_path: str,
+        ocr_result: Dict[str, Any],
+        analyze: bool,
+        analysis_type: str
+    ) -> Dict[str, Any]:
+        """Turn an OCR result into a processing result, running AI analysis if worthwhile."""
         result = {
             "image_path": image_path,
             "extracted_text": ocr_result["text"],
@@ -264,45 +716,347 @@ Document Type:"""
             "word_count": ocr_result["word_count"]
         }
         
-        # Perform AI analysis if requested
+        # Perform AI analysis if requested, unless the OCR output is too unreliable to be worth it
         if analyze and ocr_result["text"]:
-            result["analysis"] = self.analyze_extracted_text(
-                ocr_result["text"],
-                analysis_type
-            )
+            if ocr_result["confidence"] < self.min_analysis_confidence:
+                result["analysis"] = None
+                result["analysis_skipped_reason"] = "low_confidence"
+            elif ocr_result["word_count"] < _MIN_ANALYSIS_WORDS:
+                result["analysis"] = None
+                result["analysis_skipped_reason"] = "too_few_words"
+            else:
+                result["analysis"] = self.analyze_extracted_text(
+                    ocr_result["text"],
+                    analysis_type
+                )
         
         return result
     
+    def _safe_process(
+        self,
+        image_path: str,
+        analyze: bool,
+        analysis_type: str,
+        preprocess: bool = True
+    ) -> Dict[str, Any]:
+        """Process a document, reporting failures in the result instead of raising."""
+        try:
+            return self.process_document(image_path, analyze, analysis_type, preprocess)
+        except Exception as e:
+            return {
+                "image_path": image_path,
+                "error": str(e)
+            }
+    
     def batch_process(
         self,
         image_paths: List[str],
         analyze: bool = True,
-        analysis_type: str = "summary"
+        analysis_type: str = "summary",
+        max_workers: Optional[int] = None,
+        preprocess: bool = True,
+        processes: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
-        Process multiple documents.
+        Process multiple documents concurrently.
+        
+        Tesseract runs as a subprocess and the AI analysis is an HTTP call, so
+        threads overlap their waits without any pickling overhead. Without
+        preprocessing (and without tesserocr, which has no startup cost), all
+        images are OCRed by a single Tesseract run in its file-list mode, so
+        process startup is paid once rather than per image.
+        
+        With ``processes``, OCR (including preprocessing) is split across a pool
+        of worker processes instead, which scales CPU-bound preprocessing and
+        in-process Tesseract across cores. Run Tesseract single-threaded
+        (OMP_THREAD_LIMIT=1) so the workers do not oversubscribe the CPU.
         
         Args:
             image_paths: List of image file paths
             analyze: Perform AI analysis on extracted text
             analysis_type: Type of analysis to perform
+            max_workers: Number of worker threads (default: up to 8)
+            preprocess: Apply preprocessing before OCR
+            processes: Number of OCR worker processes (default: OCR in threads)
             
         Returns:
-            List of processing results
+            List of processing results, in input order
         """
+        if not image_paths:
+            return []
+        
+        workers = max_workers or min(8, len(image_paths))
+        
+        if processes:
+            ocr_results = self._ocr_files_in_processes(image_paths, preprocess, processes)
+        elif not preprocess and len(image_paths) > 1 and not self.use_tesserocr:
+            ocr_results = self._ocr_files(image_paths, preprocess)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(
+                    lambda path: self._safe_process(path, analyze, analysis_type, preprocess),
+                    image_paths
+                ))
+        
+        return self._analyze_results(image_paths, ocr_results, analyze, analysis_type, workers)
+    
+    def _analyze_results(
+        self,
+        image_paths: List[str],
+        ocr_results: List[Dict[str, Any]],
+        analyze: bool,
+        analysis_type: str,
+        max_workers: int
+    ) -> List[Dict[str, Any]]:
+        """Build processing results from OCR results, running AI analysis concurrently."""
+        def build(image_path: str, ocr_result: Dict[str, Any]) -> Dict[str, Any]:
+            if "error" in ocr_result:
+                return {"image_path": image_path, "error": ocr_result["error"]}
+            try:
+                return self._build_result(image_path, ocr_result, analyze, analysis_type)
+            except Exception as e:
+                return {"image_path": image_path, "error": str(e)}
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(build, image_paths, ocr_results))
+    
+    def _ocr_files(self, image_paths: List[str], preprocess: bool) -> List[Dict[str, Any]]:
+        """
+        OCR files without raising; files that fail get an ``error`` entry instead.
+        
+        Without tesserocr, unpreprocessed files are OCRed in a single Tesseract run
+        when possible.
+        """
+        if not preprocess and len(image_paths) > 1 and not self.use_tesserocr:
+            readable = [i for i, path in enumerate(image_paths) if os.path.isfile(path)]
+            try:
+                page_results = self._extract_file_list([image_paths[i] for i in readable])
+            except (pytesseract.TesseractError, OSError):
+                # e.g. an unreadable image aborted the run, or the tesseract binary is
+                # missing; OCR files one by one so each reports its own error
+                pass
+            else:
+                results = [{"error": "Failed to load image"} for _ in image_paths]
+                for index, page_result in zip(readable, page_results):
+                    results[index] = page_result
+                return results
+        
+        results = []
+        for path in image_paths:
+            try:
+                ocr_result = self.extract_text_with_confidence(path, preprocess)
+                del ocr_result["details"]
+                results.append(ocr_result)
+            except Exception as e:
+                results.append({"error": str(e)})
+        
+        return results
+    
+    def _ocr_files_in_processes(
+        self,
+        image_paths: List[str],
+        preprocess: bool,
+        processes: int
+    ) -> List[Dict[str, Any]]:
+        """
+        OCR files in a pool of worker processes, one contiguous chunk of paths per worker.
+        
+        Each worker handles its whole chunk in one task, so unpreprocessed chunks become a
+        single Tesseract file-list run per worker. Small batches start fewer workers, so each
+        gets at least _MIN_IMAGES_PER_PROCESS images; a batch that would need only one is
+        OCRed in this process, skipping the pool's startup.
+        """
+        processes = min(processes, math.ceil(len(image_paths) / _MIN_IMAGES_PER_PROCESS))
+        if processes <= 1:
+            return self._ocr_files(image_paths, preprocess)
+        
+        chunk_size = math.ceil(len(image_paths) / processes)
+        chunks = [
+            image_paths[i:i + chunk_size]
+            for i in range(0, len(image_paths), chunk_size)
+        ]
+        settings = {
+            "model": self.model,
+            "base_url": self.base_url,
+            "tesseract_path": pytesseract.pytesseract.tesseract_cmd,
+            "language": self.language,
+            "cache_dir": self.cache_dir,
+            "target_max_dim": self.target_max_dim
+        }
+        
+        with multiprocessing.Pool(
+            min(processes, len(chunks)), _ocr_worker_init, (settings,)
+        ) as pool:
+            return [
+                ocr_result
+                for chunk_results in pool.imap(_ocr_worker, [(chunk, preprocess) for chunk in chunks])
+                for ocr_result in chunk_results
+            ]
+    
+    def _extract_file_list(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        OCR several single-page image files with one Tesseract process.
+        
+        The paths are written to a list file, which Tesseract reads as a multi-page
+        document; words are mapped back to their image through the page number.
+        
+        Args:
+            image_paths: Paths of single-page image files
+            
+        Returns:
+            One result per path, shaped like extract_text_with_confidence's
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as list_file:
+            list_file.write("\n".join(os.path.abspath(path) for path in image_paths) + "\n")
+        try:
+            data = pytesseract.image_to_data(
+                list_file.name,
+                lang=self.language,
+                output_type=pytesseract.Output.DICT
+            )
+        finally:
+            os.unlink(list_file.name)
+        
+        pages = np.asarray(data['page_num'], dtype=np.int32)
+        conf = np.asarray(data['conf'], dtype=np.float64).astype(np.int32)
+        texts = np.asarray(data['text'], dtype=object)
+        recognized = conf > 0
+        
         results = []
-        for image_path in image_paths:
+        for page in range(1, len(image_paths) + 1):
+            mask = recognized & (pages == page)
+            results.append({
+                "text": ' '.join(texts[mask].tolist()).strip(),
+                "confidence": float(conf[mask].mean()) if mask.any() else 0,
+                "word_count": int(mask.sum())
+            })
+        
+        return results
+    
+    def warm_up(self, model: Optional[str] = None):
+        """
+        Load a model on the OLLAMA server so the first request does not wait for it.
+        
+        Args:
+            model: Model to load (default: the agent's model), e.g. the vision model
+                later passed to batch_process_vl
+        """
+        warm_up(self.client, model or self.model)
+    
+    def batch_process_vl(
+        self,
+        image_paths: List[str],
+        batch_size: int = 8,
+        model: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Transcribe multiple documents with an OLLAMA vision model, several images per request.
+        
+        Images are bucketed by resolution and padded only to their bucket's size, then
+        each bucket is sent as a single chat request with all of its images attached.
+        
+        Args:
+            image_paths: List of image file paths
+            batch_size: Maximum number of images per request
+            model: Vision model to use (default: the agent's model)
+            
+        Returns:
+            List of results with extracted text, in input order
+        """
+        model = model or self.model
+        collator = AdaptiveBatchCollator()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(image_paths)
+        
+        # Only the headers are read here, and each file is closed straight away so large
+        # batches never hold a descriptor per image; size and format stay available
+        images = []
+        for index, image_path in enumerate(image_paths):
             try:
-                result = self.process_document(image_path, analyze, analysis_type)
-                results.append(result)
+                with Image.open(image_path) as image:
+                    images.append(image)
             except Exception as e:
-                results.append({
-                    "image_path": image_path,
-                    "error": str(e)
-                })
+                results[index] = {"image_path": image_path, "error": str(e)}
+                images.append(None)
+        
+        loaded = [i for i, image in enumerate(images) if image is not None]
+        buckets = collator.group_by_size([images[i] for i in loaded])
+        
+        for bucket in buckets:
+            indices = [loaded[i] for i in bucket]
+            for start in range(0, len(indices), batch_size):
+                batch = indices[start:start + batch_size]
+                try:
+                    texts = self._transcribe_batch(
+                        self._encode_batch(
+                            [image_paths[i] for i in batch],
+                            [images[i] for i in batch],
+                            collator
+                        ),
+                        model
+                    )
+                    for position, index in enumerate(batch):
+                        results[index] = {
+                            "image_path": image_paths[index],
+                            "extracted_text": texts.get(position + 1, "")
+                        }
+                except Exception as e:
+                    for index in batch:
+                        results[index] = {"image_path": image_paths[index], "error": str(e)}
         
         return results
     
+    def _encode_batch(
+        self,
+        image_paths: List[str],
+        images: List[Image.Image],
+        collator: AdaptiveBatchCollator
+    ) -> List[str]:
+        """
+        Base64-encode a batch of images for a vision request.
+        
+        Images that already have the batch's shape are sent as their original file bytes,
+        encoded once per file version; only images that need padding are reopened,
+        decoded and re-encoded.
+        """
+        shape = collator.bucket_shape(images)
+        encoded = []
+        for image_path, image in zip(image_paths, images):
+            if image.size == shape and image.format in ("PNG", "JPEG"):
+                encoded.append(_encode_image_file(
+                    os.path.abspath(image_path), os.stat(image_path).st_mtime_ns
+                ))
+            else:
+                buffer = io.BytesIO()
+                with Image.open(image_path) as image:
+                    collator.pad_to(image, shape).save(buffer, format="PNG")
+                encoded.append(base64.b64encode(buffer.getvalue()).decode())
+        
+        return encoded
+    
+    def _transcribe_batch(self, encoded: List[str], model: str) -> Dict[int, str]:
+        """Send one chat request with several base64 images and split the per-image transcriptions."""
+        prompt = (
+            f"Transcribe all text in each of the {len(encoded)} attached images, in order. "
+            "Before each transcription write a line of the form '=== IMAGE n ===' "
+            "where n is the image number starting at 1."
+        )
+        response = self.client.chat(
+            model=model,
+            messages=[{"role": "user", "content": self._log_prompt(prompt), "images": encoded}],
+            keep_alive=DEFAULT_KEEP_ALIVE,
+            options={"temperature": 0}
+        )
+        content = response["message"]["content"]
+        
+        # re.split yields [preamble, number, text, number, text, ...]
+        parts = _IMAGE_MARKER_RE.split(content)
+        if len(parts) == 1:
+            return {1: content.strip()} if len(encoded) == 1 else {}
+        return {
+            int(number): text.strip()
+            for number, text in zip(parts[1::2], parts[2::2])
+        }
+    
     def extract_structured_data(self, text: str, fields: List[str]) -> Dict[str, str]:
         """
         Extract structured data fields from text using AI.
@@ -314,28 +1068,87 @@ Document Type:"""
         Returns:
             Dictionary of extracted fields
         """
-        fields_str = ", ".join(fields)
-        prompt = PromptTemplate(
-            input_variables=["text", "fields"],
-            template="""Extract the following fields from the text: {fields}
-
-Text: {text}
-
-Respond in the format:
-Field1: value1
-Field2: value2
-
-Extracted Data:"""
-        )
-        
-        chain = LLMChain(llm=self.llm, prompt=prompt, verbose=self.verbose)
-        response = chain.predict(text=text, fields=fields_str)
+        lines = iter_lines(stream_chat(
+            self.client,
+            self.model,
+            self._log_prompt(_structured_prompt(tuple(fields)).format(text=text)),
+            {"temperature": 0.3}
+        ))
         
-        # Parse response into dictionary
+        # Parse lines as they arrive and stop generation once every field is filled
+        requested = {field.lower() for field in fields}
         result = {}
-        for line in response.strip().split('\n'):
-            if ':' in line:
-                key, value = line.split(':', 1)
-                result[key.strip()] = value.strip()
+        for line in lines:
+            match = _FIELD_RE.match(line)
+            if match:
+                key, value = match.groups()
+                result[key] = value
+                if requested <= {key.lower() for key in result}:
+                    lines.close()
+                    break
         
         return result
+    
+    def extract_structured_data_batch(
+        self,
+        texts: List[str],
+        fields: List[str]
+    ) -> List[Dict[str, str]]:
+        """
+        Extract the same structured data fields from several texts in a single AI call.
+        
+        One request with numbered documents replaces one request per document, so the
+        instructions are prefilled once and only a single decode session runs.
+        
+        Args:
+            texts: Source texts
+            fields: List of field names to extract from every text
+            
+        Returns:
+            One dictionary of extracted fields per text, in input order
+        """
+        if not texts:
+            return []
+        
+        documents = "\n\n".join(
+            f"Document {number}:\n{text}" for number, text in enumerate(texts, 1)
+        )
+        prompt = self._log_prompt(
+            _STRUCTURED_BATCH_PROMPT.format(documents=documents, fields=", ".join(fields))
+        )
+        
+        # Leave room for every field of every document in the response
+        options = {
+            "temperature": 0.3,
+            "num_predict": max(512, 48 * len(texts) * len(fields)),
+            "num_ctx": 8192
+        }
+        
+        results: List[Dict[str, str]] = [{} for _ in texts]
+        for line in iter_lines(stream_chat(self.client, self.model, prompt, options)):
+            doc_match = _DOC_LINE_RE.match(line)
+            if not doc_match:
+                continue
+            number = int(doc_match.group(1))
+            field_match = _FIELD_RE.match(doc_match.group(2))
+            if field_match and 1 <= number <= len(texts):
+                key, value = field_match.groups()
+                results[number - 1][key] = value
+        
+        return results
+
+
+# OCR agent of the current pool worker process, created by _ocr_worker_init
+_worker_agent: Optional[OCRAgent] = None
+
+
+def _ocr_worker_init(settings: Dict[str, Any]) -> None:
+    """Pool initializer: build this worker's OCR agent once."""
+    global _worker_agent
+    _worker_agent = OCRAgent(**settings)
+
+
+def _ocr_worker(task: Any) -> List[Dict[str, Any]]:
+    """Pool task: OCR a chunk of image paths."""
+    image_paths, preprocess = task
+    return _worker_agent._ocr_files(image_paths, preprocess)
@@ -0,0 +1,192 @@
+"""
+Semantic Prompt Cache for OLLAMA Agents
+This module lets agents reuse earlier LLM responses for prompts whose free text is
+semantically equivalent to one already answered, skipping the OLLAMA call entirely on a hit.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+
+class SemanticCache:
+    """
+    A response cache keyed by sentence-embedding cosine similarity.
+
+    Only the free-text part of a prompt is embedded. Everything else that shapes the
+    response (the template and any other variables) is passed as ``context`` and must
+    match exactly, so "extract names" is never answered with a cached "extract
+    locations". Texts longer than the encoder's ``max_seq_length`` are never cached,
+    because the encoder would silently truncate them and unrelated texts with the
+    same prefix would collide.
+
+    Embeddings are L2-normalized, so a single matrix-vector product against the
+    stored embeddings of a context yields the cosine similarity to every cached
+    text. Entries can be persisted to a directory as an append-only
+    ``embeddings.f32`` + ``entries.jsonl`` pair to survive restarts.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        threshold: float = 0.95,
+        cache_dir: Optional[str] = None
+    ):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            model_name: sentence-transformers model used to embed prompts
+            threshold: Minimum cosine similarity for a cache hit (0.0 to 1.0)
+            cache_dir: Directory to persist cache entries in (optional)
+        """
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "SemanticCache requires sentence-transformers: "
+                "pip install sentence-transformers"
+            ) from e
+
+        self.threshold = threshold
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._encoder = SentenceTransformer(model_name)
+        self._lock = threading.Lock()
+
+        self._dim = self._encoder.get_sentence_embedding_dimension()
+        # Per context: (embedding buffer with spare rows, responses); the first
+        # len(responses) rows of the buffer are in use
+        self._buckets: Dict[str, Tuple[np.ndarray, List[str]]] = {}
+
+        if self.cache_dir:
+            self._load()
+
+    def _fits(self, text: str) -> bool:
+        """Return whether the encoder sees all of a text instead of truncating it."""
+        tokens = self._encoder.tokenizer(text, add_special_tokens=True)["input_ids"]
+        return len(tokens) <= self._encoder.max_seq_length
+
+    def _embed(self, text: str) -> np.ndarray:
+        """Embed a text as an L2-normalized float32 vector."""
+        return self._encoder.encode(
+            text,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        ).astype(np.float32)
+
+    def _lookup(self, context: str, embedding: np.ndarray) -> Optional[str]:
+        """Return the best cached response for the context above the threshold, if any."""
+        with self._lock:
+            bucket = self._buckets.get(context)
+            if bucket is None:
+                return None
+            buffer, responses = bucket
+            scores = buffer[:len(responses)] @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                return responses[best]
+        return None
+
+    def _append(self, context: str, embedding: np.ndarray, response: str):
+        """Add an entry in memory, doubling the context's buffer when it is full."""
+        buffer, responses = self._buckets.get(context) or (
+            np.empty((16, self._dim), dtype=np.float32), []
+        )
+        if len(responses) == len(buffer):
+            grown = np.empty((2 * len(buffer), self._dim), dtype=np.float32)
+            grown[:len(buffer)] = buffer
+            buffer = grown
+        buffer[len(responses)] = embedding
+        responses.append(response)
+        self._buckets[context] = (buffer, responses)
+
+    def _store(self, context: str, embedding: np.ndarray, response: str):
+        """Add an entry to the cache and append it to the cache directory if one is set."""
+        with self._lock:
+            self._append(context, embedding, response)
+            if self.cache_dir:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                with open(self.cache_dir / "embeddings.f32", "ab") as f:
+                    f.write(embedding.tobytes())
+                with open(self.cache_dir / "entries.jsonl", "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"context": context, "response": response}) + "\n")
+
+    def _load(self):
+        """Load persisted entries from the cache directory."""
+        embeddings_path = self.cache_dir / "embeddings.f32"
+        entries_path = self.cache_dir / "entries.jsonl"
+        if not (embeddings_path.exists() and entries_path.exists()):
+            return
+
+        embeddings = np.fromfile(embeddings_path, dtype=np.float32)
+        embeddings = embeddings[:len(embeddings) // self._dim * self._dim].reshape(-1, self._dim)
+        with open(entries_path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+
+        # Only trust entries present in both files (guards against a partial write)
+        for embedding, entry in zip(embeddings, entries):
+            self._append(entry["context"], embedding, entry["response"])
+
+    def get(self, text: str, context: str = "") -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            text: Free text of the prompt, compared semantically
+            context: Everything else the response depends on, compared exactly
+
+        Returns:
+            Cached response, or None on a miss
+        """
+        if not self._fits(text):
+            return None
+        return self._lookup(context, self._embed(text))
+
+    def put(self, text: str, response: str, context: str = ""):
+        """
+        Store a response. Texts too long to embed whole are not stored.
+
+        Args:
+            text: Free text of the prompt, compared semantically
+            response: LLM response to cache
+            context: Everything else the response depends on, compared exactly
+        """
+        if self._fits(text):
+            self._store(context, self._embed(text), response)
+
+    def get_or_compute(self, text: str, compute: Callable[[], str], context: str = "") -> str:
+        """
+        Return a cached response, or compute and cache a new one.
+
+        Args:
+            text: Free text of the prompt, compared semantically
+            compute: Zero-argument callable producing the response on a miss
+            context: Everything else the response depends on, compared exactly
+
+        Returns:
+            Cached or freshly computed response
+        """
+        if not self._fits(text):
+            return compute()
+
+        embedding = self._embed(text)
+        cached = self._lookup(context, embedding)
+        if cached is not None:
+            return cached
+
+        response = compute()
+        self._store(context, embedding, response)
+        return response
+
+    def clear(self):
+        """Remove all cached entries, including persisted ones."""
+        with self._lock:
+            self._buckets.clear()
+            if self.cache_dir:
+                for name in ("embeddings.f32", "entries.jsonl"):
+                    (self.cache_dir / name).unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return sum(len(responses) for _, responses in self._buckets.values())
@@ -237,8 +237,8 @@ def main():
     print("""
 1. Install OLLAMA:     https://ollama.ai/
 2. Install Tesseract:  See QUICKSTART.md
-3. Install Python deps: pip install -r requirements.txt
-4. Run examples:       python examples/ai_agent_example.py
+3. Install the package: pip install -e .
+4. Run examples:       ai-agent-example, ocr-agent-example, advanced-workflow
 
 For detailed instructions, see QUICKSTART.md
 For advanced topics, see RESEARCH_GUIDE.md
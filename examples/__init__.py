@@ -0,0 +1,3 @@
+"""
+Runnable examples for the AI and OCR agents
+"""
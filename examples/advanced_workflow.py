@@ -7,68 +7,90 @@ This example demonstrates how to combine both agents for intelligent document pr
 - Create a complete document understanding pipeline
 """
 
-import sys
+import asyncio
+import os
+import queue
+import threading
+from functools import lru_cache
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
+import ollama
+from PIL import Image, ImageDraw
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Single-threaded Tesseract; parallelism comes from running several at once.
+# Must be set before Tesseract is first loaded.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
 
 from agents import AIAgent, OCRAgent
-from utils import check_ollama_availability
+from utils.imaging import DEJAVU_SANS, DEJAVU_SANS_BOLD, get_font, save_binarized, white_canvas
 
 
-def create_business_card(output_path: str):
-    """Create a sample business card image."""
-    img = Image.new('RGB', (600, 350), color='white')
+@lru_cache(maxsize=1)
+def _business_card_template() -> Image.Image:
+    """Render the parts of the business card that never change: border, rule and company."""
+    img = white_canvas(600, 350)
     draw = ImageDraw.Draw(img)
     
     # Add border
     draw.rectangle([(10, 10), (590, 340)], outline='black', width=2)
+    draw.line([(50, 120), (550, 120)], fill='black', width=1)
+    draw.text((50, 290), "TechCorp Solutions Inc.", fill='black', font=get_font(DEJAVU_SANS, 18))
     
-    try:
-        font_large = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 28)
-        font_medium = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
-        font_small = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 14)
-    except:
-        font_large = font_medium = font_small = ImageFont.load_default()
+    return img
+
+
+def create_business_card(output_path: str) -> Image.Image:
+    """Create a sample business card image and return it."""
+    # Start from the pre-rendered template and draw only the personal details
+    img = _business_card_template().copy()
+    draw = ImageDraw.Draw(img)
+    
+    font_large = get_font(DEJAVU_SANS_BOLD, 28)
+    font_medium = get_font(DEJAVU_SANS, 18)
+    font_small = get_font(DEJAVU_SANS, 14)
     
     # Draw business card content
     draw.text((50, 40), "JOHN SMITH", fill='black', font=font_large)
     draw.text((50, 80), "Senior Software Engineer", fill='gray', font=font_medium)
-    draw.line([(50, 120), (550, 120)], fill='black', width=1)
     
     draw.text((50, 150), "Email: john.smith@techcorp.com", fill='black', font=font_small)
     draw.text((50, 180), "Phone: +1 (555) 123-4567", fill='black', font=font_small)
     draw.text((50, 210), "Location: San Francisco, CA", fill='black', font=font_small)
     draw.text((50, 240), "LinkedIn: linkedin.com/in/johnsmith", fill='black', font=font_small)
     
-    draw.text((50, 290), "TechCorp Solutions Inc.", fill='black', font=font_medium)
-    
-    img.save(output_path)
+    img = save_binarized(img, output_path)
     print(f"✓ Created business card: {output_path}")
+    return img
 
 
-def create_receipt(output_path: str):
-    """Create a sample receipt image."""
-    img = Image.new('RGB', (500, 600), color='white')
+@lru_cache(maxsize=1)
+def _receipt_template() -> Image.Image:
+    """Render the receipt header shared by every receipt: store details and rules."""
+    img = white_canvas(500, 600)
     draw = ImageDraw.Draw(img)
     
-    try:
-        font_title = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-        font_normal = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 16)
-    except:
-        font_title = font_normal = ImageFont.load_default()
+    font_title = get_font(DEJAVU_SANS_BOLD, 24)
+    font_normal = get_font(DEJAVU_SANS, 16)
     
-    # Draw receipt content
     draw.text((150, 30), "TECH STORE", fill='black', font=font_title)
     draw.text((120, 60), "123 Market Street", fill='black', font=font_normal)
     draw.text((130, 85), "San Francisco, CA", fill='black', font=font_normal)
     draw.line([(50, 120), (450, 120)], fill='black', width=2)
+    draw.line([(50, 200), (450, 200)], fill='black', width=1)
+    
+    return img
+
+
+def create_receipt(output_path: str) -> Image.Image:
+    """Create a sample receipt image and return it."""
+    # Start from the pre-rendered header and draw only this receipt's details
+    img = _receipt_template().copy()
+    draw = ImageDraw.Draw(img)
+    
+    font_title = get_font(DEJAVU_SANS_BOLD, 24)
+    font_normal = get_font(DEJAVU_SANS, 16)
     
     draw.text((50, 140), "Date: 2024-01-15", fill='black', font=font_normal)
     draw.text((50, 165), "Receipt #: 00123456", fill='black', font=font_normal)
-    draw.line([(50, 200), (450, 200)], fill='black', width=1)
     
     # Items
     items = [
@@ -78,11 +100,14 @@ def create_receipt(output_path: str):
         ("USB Cable", "$15.99"),
     ]
     
-    y = 220
-    for item, price in items:
-        draw.text((50, y), item, fill='black', font=font_normal)
-        draw.text((350, y), price, fill='black', font=font_normal)
-        y += 30
+    # One call per column; spacing keeps the 30px row pitch
+    draw.multiline_text(
+        (50, 220), "\n".join(item for item, _ in items), fill='black', font=font_normal, spacing=14
+    )
+    draw.multiline_text(
+        (350, 220), "\n".join(price for _, price in items), fill='black', font=font_normal, spacing=14
+    )
+    y = 220 + len(items) * 30
     
     draw.line([(50, y + 10), (450, y + 10)], fill='black', width=1)
     
@@ -98,117 +123,227 @@ def create_receipt(output_path: str):
     draw.text((50, y + 110), "TOTAL:", fill='black', font=font_title)
     draw.text((320, y + 110), "$1,221.67", fill='black', font=font_title)
     
-    img.save(output_path)
+    img = save_binarized(img, output_path)
     print(f"✓ Created receipt: {output_path}")
+    return img
 
 
-def main():
-    """Demonstrate combined AI and OCR agent workflows."""
-    
-    print("=" * 70)
-    print("Advanced Example: AI + OCR Agent Workflow")
-    print("=" * 70)
-    
-    # Check prerequisites
-    if not check_ollama_availability():
-        print("\n⚠️  WARNING: OLLAMA service not detected")
-        print("This example requires OLLAMA to be running.\n")
-    
-    # Create temp directory
-    temp_dir = Path("/tmp/advanced_examples")
-    temp_dir.mkdir(exist_ok=True)
-    
-    # Initialize both agents
-    print("\n1. Initializing agents...")
-    ai_agent = AIAgent(model="llama2", temperature=0.7)
-    ocr_agent = OCRAgent(model="llama2", language="eng")
-    print("✓ Both agents initialized!")
+def process_document_pipeline(ocr_agent, ai_agent, documents, log=print):
+    """
+    Complete document processing pipeline, run as three overlapping stages.
+    
+    OCR is CPU-bound (Tesseract) while the AI steps wait on OLLAMA, so the stages run
+    in their own threads connected by bounded queues: while one document is being
+    analyzed, the next one is already being OCR'd.
+    
+    Args:
+        ocr_agent: OCR agent
+        ai_agent: AI agent
+        documents: List of (image_path, doc_type) tuples
+        log: Called with each progress message (default: print)
+        
+    Returns:
+        List of pipeline results, in input order
+    """
+    load_queue = queue.Queue(maxsize=4)
+    ocr_queue = queue.Queue(maxsize=4)
+    results = [None] * len(documents)
+    summary_texts = []  # (index, text), summarized together once the stages finish
+    
+    def load_stage():
+        """Stage 1: feed documents into the pipeline."""
+        for index, (image_path, doc_type) in enumerate(documents):
+            load_queue.put((index, image_path, doc_type))
+        load_queue.put(None)
+    
+    def ocr_stage():
+        """Stage 2: OCR extraction."""
+        while (item := load_queue.get()) is not None:
+            index, image_path, doc_type = item
+            try:
+                result = ocr_agent.process_document(image_path, analyze=False)
+            except Exception as e:
+                # Keep draining the queue so the other stages never block
+                log(f"\n❌ {doc_type}: OCR failed - {e}")
+                results[index] = {"error": str(e)}
+                continue
+            log(f"\n📄 {doc_type}: text extracted (confidence: {result['confidence']:.2f}%)")
+            ocr_queue.put((index, doc_type, result['extracted_text']))
+        ocr_queue.put(None)
+    
+    def ai_stage():
+        """Stage 3: classification and structured extraction."""
+        while (item := ocr_queue.get()) is not None:
+            index, doc_type, text = item
+            try:
+                # AI classification
+                doc_class = ocr_agent.analyze_extracted_text(text, "classification")
+                log(f"  ✓ {doc_type} classified as: {doc_class.split(':')[-1].strip()}")
+                
+                # Extract key information based on document type
+                if "business card" in doc_class.lower() or doc_type == "Business Card":
+                    fields = ["Name", "Email", "Phone"]
+                else:
+                    fields = ["Date", "Total", "Items"]
+                
+                structured = ocr_agent.extract_structured_data(text, fields)
+                log(f"  ✓ {doc_type}: extracted {len(structured)} structured fields")
+            except Exception as e:
+                log(f"  ❌ {doc_type}: AI analysis failed - {e}")
+                results[index] = {"error": str(e)}
+                continue
+            
+            results[index] = {
+                "type": doc_class,
+                "data": structured
+            }
+            summary_texts.append((index, text))
+    
+    stages = [threading.Thread(target=stage) for stage in (load_stage, ocr_stage, ai_stage)]
+    for stage in stages:
+        stage.start()
+    for stage in stages:
+        stage.join()
+    
+    # Summaries are independent of each other, so send them as one concurrent batch
+    if summary_texts:
+        summaries = ai_agent.summarize_many([text for _, text in summary_texts], max_length=50)
+        for (index, _), summary in zip(summary_texts, summaries):
+            results[index]["summary"] = summary
+            log(f"  ✓ Summary: {summary[:100]}...")
+    
+    return results
+
+
+def _classify(ocr_agent, text):
+    """Classify a document, stopping generation once the document type line is complete."""
+    fragments = ocr_agent.analyze_extracted_text(text, "classification", stream=True)
+    response = ""
+    try:
+        for fragment in fragments:
+            response += fragment
+            if "\n" in response.lstrip():
+                break
+    finally:
+        fragments.close()
+    return response.strip().split("\n")[0]
+
+
+async def _run_ocr(ocr_slots, func, *args, **kwargs):
+    """Run a blocking OCR call in a worker thread, at most one per OCR slot."""
+    async with ocr_slots:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+def _header(title):
+    """Return a workflow's banner."""
+    return "\n" + "=" * 70 + f"\n{title}\n" + "=" * 70
+
+
+async def workflow_1(ocr_agent, ai_agent, temp_dir, ocr_slots, chat_lock):
+    """
+    Workflow 1: Business card processing.
     
-    # Workflow 1: Business Card Processing
-    print("\n" + "=" * 70)
-    print("Workflow 1: Intelligent Business Card Processing")
-    print("=" * 70)
+    Returns:
+        (output, card_path, card_text)
+    """
+    out = [_header("Workflow 1: Intelligent Business Card Processing")]
     
     # Create sample business card
     card_path = temp_dir / "business_card.png"
-    create_business_card(str(card_path))
+    card_image = await asyncio.to_thread(create_business_card, str(card_path))
     
-    # Step 1: Extract text using OCR
-    print("\n📸 Step 1: Extracting text from business card...")
-    card_text = ocr_agent.extract_text(str(card_path))
-    print(f"✓ Extracted text:\n{card_text}\n")
+    # Step 1: Extract text using OCR (from memory; the file is kept for Workflow 5)
+    out.append("\n📸 Step 1: Extracting text from business card...")
+    card_text = await _run_ocr(ocr_slots, ocr_agent.extract_text, card_image)
+    out.append(f"✓ Extracted text:\n{card_text}\n")
     
     # Step 2: Extract structured contact information using OCR Agent
-    print("📋 Step 2: Extracting structured data...")
+    out.append("📋 Step 2: Extracting structured data...")
     contact_fields = ["Name", "Title", "Email", "Phone", "Location", "Company"]
-    contact_data = ocr_agent.extract_structured_data(card_text, contact_fields)
+    contact_data = await asyncio.to_thread(
+        ocr_agent.extract_structured_data, card_text, contact_fields
+    )
     
-    print("✓ Structured contact information:")
+    out.append("✓ Structured contact information:")
     for field, value in contact_data.items():
-        print(f"  - {field}: {value}")
+        out.append(f"  - {field}: {value}")
     
     # Step 3: Use AI to generate a professional summary
-    print("\n🤖 Step 3: Generating professional summary using AI...")
+    out.append("\n🤖 Step 3: Generating professional summary using AI...")
     summary_prompt = f"Based on this business card information, write a brief professional introduction:\n\n{card_text}"
-    introduction = ai_agent.chat(summary_prompt)
-    print(f"✓ Generated introduction:\n{introduction}")
+    async with chat_lock:
+        introduction = await asyncio.to_thread(ai_agent.chat, summary_prompt)
+    out.append(f"✓ Generated introduction:\n{introduction}")
     
-    # Workflow 2: Receipt Analysis and Insights
-    print("\n" + "=" * 70)
-    print("Workflow 2: Receipt Analysis with Financial Insights")
-    print("=" * 70)
+    return "\n".join(out), card_path, card_text
+
+
+async def workflow_2(ocr_agent, ai_agent, temp_dir, ocr_slots, chat_lock):
+    """
+    Workflow 2: Receipt analysis.
+    
+    Returns:
+        (output, receipt_path, receipt_text)
+    """
+    out = [_header("Workflow 2: Receipt Analysis with Financial Insights")]
     
     # Create sample receipt
     receipt_path = temp_dir / "receipt.png"
-    create_receipt(str(receipt_path))
+    await asyncio.to_thread(create_receipt, str(receipt_path))
     
     # Step 1: Process receipt with OCR
-    print("\n📸 Step 1: Processing receipt with OCR...")
-    receipt_result = ocr_agent.process_document(
+    out.append("\n📸 Step 1: Processing receipt with OCR...")
+    receipt_result = await _run_ocr(
+        ocr_slots,
+        ocr_agent.process_document,
         str(receipt_path),
         analyze=True,
         analysis_type="key_points"
     )
+    receipt_text = receipt_result['extracted_text']
     
-    print(f"✓ OCR Confidence: {receipt_result['confidence']:.2f}%")
-    print(f"✓ Extracted text:\n{receipt_result['extracted_text']}\n")
+    out.append(f"✓ OCR Confidence: {receipt_result['confidence']:.2f}%")
+    out.append(f"✓ Extracted text:\n{receipt_text}\n")
     
-    if 'analysis' in receipt_result:
-        print(f"📊 Key points identified:\n{receipt_result['analysis']}\n")
+    if receipt_result.get('analysis'):
+        out.append(f"📊 Key points identified:\n{receipt_result['analysis']}\n")
     
     # Step 2: Extract financial data
-    print("💰 Step 2: Extracting financial details...")
+    out.append("💰 Step 2: Extracting financial details...")
     financial_fields = ["Date", "Receipt Number", "Subtotal", "Tax", "Total"]
-    financial_data = ocr_agent.extract_structured_data(
-        receipt_result['extracted_text'],
-        financial_fields
+    financial_data = await asyncio.to_thread(
+        ocr_agent.extract_structured_data, receipt_text, financial_fields
     )
     
-    print("✓ Financial details:")
+    out.append("✓ Financial details:")
     for field, value in financial_data.items():
-        print(f"  - {field}: {value}")
+        out.append(f"  - {field}: {value}")
     
     # Step 3: Use AI to categorize expenses and provide insights
-    print("\n🤖 Step 3: AI-powered expense analysis...")
+    out.append("\n🤖 Step 3: AI-powered expense analysis...")
     analysis_prompt = f"""Analyze this receipt and provide:
 1. Expense category
 2. Budget recommendations
 3. Any notable observations
 
 Receipt details:
-{receipt_result['extracted_text']}
+{receipt_text}
 """
     
-    expense_analysis = ai_agent.chat(analysis_prompt)
-    print(f"✓ Expense analysis:\n{expense_analysis}")
+    async with chat_lock:
+        expense_analysis = await asyncio.to_thread(ai_agent.chat, analysis_prompt)
+    out.append(f"✓ Expense analysis:\n{expense_analysis}")
     
-    # Workflow 3: Multi-Document Intelligence
-    print("\n" + "=" * 70)
-    print("Workflow 3: Multi-Document Analysis with Cross-Referencing")
-    print("=" * 70)
+    return "\n".join(out), receipt_path, receipt_text
+
+
+async def workflow_3(ai_agent, card_text, receipt_text):
+    """Workflow 3: Cross-referencing the business card and the receipt."""
+    out = [_header("Workflow 3: Multi-Document Analysis with Cross-Referencing")]
     
     # Combine information from both documents
-    print("\n🔗 Analyzing relationship between documents...")
+    out.append("\n🔗 Analyzing relationship between documents...")
     
     combined_prompt = f"""I have two documents:
 
@@ -216,7 +351,7 @@ Document 1 (Business Card):
 {card_text}
 
 Document 2 (Receipt):
-{receipt_result['extracted_text']}
+{receipt_text}
 
 Please answer:
 1. Could this receipt belong to the person on the business card?
@@ -224,74 +359,120 @@ Please answer:
 3. What insights can you derive from having both documents?
 """
     
-    cross_analysis = ai_agent.reason(combined_prompt)
-    print(f"✓ Cross-document analysis:\n{cross_analysis}")
+    cross_analysis = await asyncio.to_thread(ai_agent.reason, combined_prompt)
+    out.append(f"✓ Cross-document analysis:\n{cross_analysis}")
     
-    # Workflow 4: Document Classification and Routing
-    print("\n" + "=" * 70)
-    print("Workflow 4: Automated Document Classification")
-    print("=" * 70)
+    return "\n".join(out)
+
+
+async def workflow_4(ocr_agent, documents):
+    """
+    Workflow 4: Document classification.
+    
+    Args:
+        documents: List of (image_path, expected_type, text) tuples
+    """
+    out = [_header("Workflow 4: Automated Document Classification")]
+    
+    out.append("\n📂 Classifying documents...")
+    # Only the first line (the document type) of each response is needed
+    classifications = await asyncio.gather(*(
+        asyncio.to_thread(_classify, ocr_agent, text) for _, _, text in documents
+    ))
+    for (doc_path, expected_type, _), classification in zip(documents, classifications):
+        out.append(f"\n✓ Document: {Path(doc_path).name}")
+        out.append(f"  Expected: {expected_type}")
+        out.append(f"  Classified as: {classification}")
+    
+    return "\n".join(out)
+
+
+async def workflow_5(ocr_agent, ai_agent, documents, ocr_slots):
+    """
+    Workflow 5: The complete document processing pipeline.
+    
+    Args:
+        documents: List of (image_path, doc_type) tuples
+    """
+    out = [_header("Workflow 5: Complete Document Processing Pipeline")]
+    
+    out.append("\n🔄 Running complete pipeline...")
+    
+    # The pipeline demonstrates the full flow, so it runs OCR again from the images
+    await _run_ocr(
+        ocr_slots, process_document_pipeline, ocr_agent, ai_agent, documents, out.append
+    )
     
+    return "\n".join(out)
+
+
+async def run_workflows(ocr_agent, ai_agent, temp_dir):
+    """
+    Run the workflows, overlapping those that do not depend on each other.
+    
+    Each workflow buffers its output, which is printed once it finishes so the
+    workflows' output does not interleave.
+    """
+    # Bound concurrent Tesseract runs to the number of cores
+    ocr_slots = asyncio.Semaphore(os.cpu_count() or 1)
+    # chat() extends the shared conversation memory, so one chat at a time
+    chat_lock = asyncio.Lock()
+    
+    # Workflows 1 and 2 are independent
+    (output_1, card_path, card_text), (output_2, receipt_path, receipt_text) = await asyncio.gather(
+        workflow_1(ocr_agent, ai_agent, temp_dir, ocr_slots, chat_lock),
+        workflow_2(ocr_agent, ai_agent, temp_dir, ocr_slots, chat_lock)
+    )
+    print(output_1)
+    print(output_2)
+    
+    # Workflows 3 to 5 only need the documents and text from 1 and 2
     documents = [
-        (str(card_path), "Business Card"),
-        (str(receipt_path), "Receipt")
+        (str(card_path), "Business Card", card_text),
+        (str(receipt_path), "Receipt", receipt_text)
     ]
+    outputs = await asyncio.gather(
+        workflow_3(ai_agent, card_text, receipt_text),
+        workflow_4(ocr_agent, documents),
+        workflow_5(
+            ocr_agent,
+            ai_agent,
+            [(doc_path, doc_type) for doc_path, doc_type, _ in documents],
+            ocr_slots
+        )
+    )
+    for output in outputs:
+        print(output)
+
+
+def main():
+    """Demonstrate combined AI and OCR agent workflows."""
     
-    print("\n📂 Classifying documents...")
-    for doc_path, expected_type in documents:
-        # Extract text
-        text = ocr_agent.extract_text(doc_path)
-        
-        # Classify using AI
-        classification = ocr_agent.analyze_extracted_text(text, "classification")
-        
-        print(f"\n✓ Document: {Path(doc_path).name}")
-        print(f"  Expected: {expected_type}")
-        print(f"  Classified as: {classification}")
-    
-    # Workflow 5: Intelligent Data Extraction Pipeline
-    print("\n" + "=" * 70)
-    print("Workflow 5: Complete Document Processing Pipeline")
+    print("=" * 70)
+    print("Advanced Example: AI + OCR Agent Workflow")
     print("=" * 70)
     
-    print("\n🔄 Running complete pipeline...")
+    # Create temp directory
+    temp_dir = Path("/tmp/advanced_examples")
+    temp_dir.mkdir(exist_ok=True)
     
-    def process_document_pipeline(image_path: str, doc_type: str):
-        """Complete document processing pipeline."""
-        print(f"\n📄 Processing {doc_type}...")
-        
-        # OCR extraction
-        result = ocr_agent.process_document(image_path, analyze=False)
-        print(f"  ✓ Text extracted (confidence: {result['confidence']:.2f}%)")
-        
-        # AI classification
-        doc_class = ocr_agent.analyze_extracted_text(result['extracted_text'], "classification")
-        print(f"  ✓ Classified as: {doc_class.split(':')[-1].strip()}")
-        
-        # Extract key information based on document type
-        if "business card" in doc_class.lower() or doc_type == "Business Card":
-            fields = ["Name", "Email", "Phone"]
-        else:
-            fields = ["Date", "Total", "Items"]
-        
-        structured = ocr_agent.extract_structured_data(result['extracted_text'], fields)
-        print(f"  ✓ Extracted {len(structured)} structured fields")
-        
-        # Generate summary
-        summary = ai_agent.summarize(result['extracted_text'], max_length=50)
-        print(f"  ✓ Summary: {summary[:100]}...")
-        
-        return {
-            "type": doc_class,
-            "data": structured,
-            "summary": summary
-        }
-    
-    # Process all documents through pipeline
-    pipeline_results = []
-    for doc_path, doc_type in documents:
-        result = process_document_pipeline(doc_path, doc_type)
-        pipeline_results.append(result)
+    # Initialize both agents
+    print("\n1. Initializing agents...")
+    # One client, so both agents share its pooled connections
+    client = ollama.Client(host="http://localhost:11434")
+    try:
+        # Also checks that OLLAMA is available, which every workflow requires
+        ai_agent = AIAgent(model="llama2", temperature=0.7, client=client)
+    except ConnectionError as e:
+        print(f"\n⚠️  WARNING: {e}")
+        return
+    ocr_agent = OCRAgent(model="llama2", language="eng", client=client)
+    
+    # Both agents use the same model: load it once, before the workflows start
+    ai_agent.warm_up()
+    print("✓ Both agents initialized!")
+    
+    asyncio.run(run_workflows(ocr_agent, ai_agent, temp_dir))
     
     print("\n" + "=" * 70)
     print("✓ All workflows completed successfully!")
@@ -9,14 +9,7 @@ This example demonstrates how to use the AI Agent for various tasks:
 - Information extraction
 """
 
-import sys
-from pathlib import Path
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from agents import AIAgent
-from utils import check_ollama_availability
 
 
 def main():
@@ -26,20 +19,17 @@ def main():
     print("AI Agent Example - OLLAMA & LangChain")
     print("=" * 60)
     
-    # Check if OLLAMA is available
-    if not check_ollama_availability():
-        print("\n⚠️  WARNING: OLLAMA service not detected at http://localhost:11434")
-        print("Please make sure OLLAMA is installed and running.")
-        print("Visit: https://ollama.ai/")
-        print("\nThis example will continue but may fail without OLLAMA.\n")
-    
-    # Initialize AI Agent
+    # Initialize AI Agent (this also checks that OLLAMA is available)
     print("\n1. Initializing AI Agent...")
-    agent = AIAgent(
-        model="llama2",  # Change to your preferred model
-        temperature=0.7,
-        verbose=False
-    )
+    try:
+        agent = AIAgent(
+            model="llama2",  # Change to your preferred model
+            temperature=0.7,
+            verbose=False
+        )
+    except ConnectionError as e:
+        print(f"\n⚠️  WARNING: {e}")
+        return
     print("✓ Agent initialized successfully!")
     
     # Example 1: Basic Chat
@@ -2,6 +2,28 @@
 Utilities package for OLLAMA agents
 """
 
-from .config import load_config, check_ollama_availability, list_available_models
+from .config import (
+    AppConfig,
+    OCRConfig,
+    OllamaConfig,
+    load_config,
+    check_ollama_availability,
+    check_ollama_api_ready,
+    list_available_models,
+    get_ollama_status,
+    acheck_ollama_availability,
+    alist_available_models
+)
 
-__all__ = ['load_config', 'check_ollama_availability', 'list_available_models']
+__all__ = [
+    'AppConfig',
+    'OCRConfig',
+    'OllamaConfig',
+    'load_config',
+    'check_ollama_availability',
+    'check_ollama_api_ready',
+    'list_available_models',
+    'get_ollama_status',
+    'acheck_ollama_availability',
+    'alist_available_models'
+]
@@ -2,71 +2,446 @@
 Configuration utilities for OLLAMA agents
 """
 
+import asyncio
+import atexit
 import os
-from typing import Dict, Any
-from dotenv import load_dotenv
+import re
+import socket
+import threading
+import time
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Final, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlparse
 
+# Only the synchronous service checks need requests, so a missing package fails
+# those calls instead of the import
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except ImportError:
+    requests = None
+
+# Likewise httpx, which only the async variants use
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import orjson  # Optional: faster JSON parsing
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # Optional: streaming JSON parsing
+except ImportError:
+    ijson = None
+
+
+class OllamaConfig(NamedTuple):
+    """OLLAMA server settings."""
+    base_url: str
+    model: str
+
+
+class OCRConfig(NamedTuple):
+    """Tesseract settings."""
+    tesseract_path: Optional[str]
+    language: str
+
+
+class AppConfig(NamedTuple):
+    """Complete application configuration."""
+    ollama: OllamaConfig
+    ocr: OCRConfig
+
+
+# "KEY=value" lines of a .env file, optionally prefixed with "export"
+_ENV_LINE_RE = re.compile(r'^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*=\s*(.*?)\s*$')
+
+# A single- or double-quoted value, optionally followed by a comment
+_ENV_QUOTED_RE = re.compile(r'^([\'"])(.*?)\1\s*(?:#.*)?$')
+
+# Base URLs that have accepted a connection; failed probes are never cached
+_AVAILABLE_URLS: Set[str] = set()
+
+# Shared HTTP session, so repeated checks reuse keep-alive connections
+_SESSION: Optional["requests.Session"] = None
+_SESSION_LOCK = threading.Lock()
 
-def load_config() -> Dict[str, Any]:
+# Shared async HTTP client for the a* variants, bound to the event loop that created it
+_ASYNC_CLIENT: Optional["httpx.AsyncClient"] = None
+_ASYNC_CLIENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+# Model lists per base URL as (fetched_at, names); they change on the order of minutes
+_MODELS_TTL = 30.0
+_MODELS_CACHE: Dict[str, Tuple[float, List[str]]] = {}
+_MODELS_LOCK = threading.Lock()
+
+# One fetch lock per base URL, so a slow server only holds up its own callers
+_FETCH_LOCKS: Dict[str, threading.Lock] = {}
+
+
+def _find_env_file() -> Optional[Path]:
+    """
+    Locate the .env file the way python-dotenv's find_dotenv does.
+    
+    The search walks up from this package's directory, so the project's .env is
+    found whatever the working directory, then up from the working directory.
+    """
+    for start in (Path(__file__).resolve().parent, Path.cwd()):
+        for directory in (start, *start.parents):
+            candidate = directory / ".env"
+            if candidate.is_file():
+                return candidate
+    return None
+
+
+def _load_env(path: Optional[str] = None) -> None:
+    """
+    Load variables from a .env file into the environment.
+    
+    Variables already set in the environment win. Quoted values keep everything
+    between the quotes, including "#"; unquoted values end at a " #" comment.
+    
+    Args:
+        path: Path to the .env file (default: the nearest .env, see _find_env_file;
+            missing files are ignored)
+    """
+    if path is None:
+        path = _find_env_file()
+        if path is None:
+            return
+    
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except OSError:
+        return
+    
+    for line in text.splitlines():
+        match = _ENV_LINE_RE.match(line)
+        if not match:
+            continue  # Blank lines, comments and malformed lines
+        key, value = match.groups()
+        quoted = _ENV_QUOTED_RE.match(value)
+        if quoted:
+            value = quoted.group(2)
+        else:
+            value = value.split(" #", 1)[0].rstrip()
+        os.environ.setdefault(key, value)
+
+
+def _get_session() -> "requests.Session":
+    """Return the module's HTTP session, creating it on first use."""
+    global _SESSION
+    if requests is None:
+        raise ImportError(
+            "requests is required for OLLAMA service checks. "
+            "Install it with: pip install requests"
+        )
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                session = requests.Session()
+                # No retries of any kind: a down local server should fail at once,
+                # and the pool is sized for agents probing from many threads
+                adapter = HTTPAdapter(
+                    pool_connections=8,
+                    pool_maxsize=32,
+                    max_retries=Retry(
+                        total=0,
+                        connect=0,
+                        read=0,
+                        status=0,
+                        backoff_factor=0,
+                        respect_retry_after_header=False
+                    )
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _SESSION = session
+    return _SESSION
+
+
+async def _get_async_client() -> "httpx.AsyncClient":
+    """Return the module's async HTTP client for the running event loop."""
+    global _ASYNC_CLIENT, _ASYNC_CLIENT_LOOP
+    if httpx is None:
+        raise ImportError(
+            "httpx is required for the async OLLAMA service checks. "
+            "Install it with: pip install httpx"
+        )
+    loop = asyncio.get_running_loop()
+    # Pooled connections cannot outlive their loop, e.g. across asyncio.run calls
+    if _ASYNC_CLIENT is None or _ASYNC_CLIENT_LOOP is not loop:
+        previous = _ASYNC_CLIENT
+        _ASYNC_CLIENT = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=httpx.Timeout(5.0, connect=1.0)
+        )
+        _ASYNC_CLIENT_LOOP = loop
+        if previous is not None:
+            # Closing empties the old pool even when its loop is gone and a
+            # connection fails to shut down cleanly
+            try:
+                await previous.aclose()
+            except Exception:
+                pass
+    return _ASYNC_CLIENT
+
+
+@atexit.register
+def _close_async_client() -> None:
+    """Release the async client's connection pool at exit."""
+    if _ASYNC_CLIENT is not None and not _ASYNC_CLIENT.is_closed:
+        try:
+            asyncio.run(_ASYNC_CLIENT.aclose())
+        except Exception:
+            pass
+
+
+def load_config() -> AppConfig:
     """
     Load configuration from environment variables.
     
+    The .env file and environment are read once, when this module is imported.
+    
     Returns:
-        Configuration dictionary
+        Immutable configuration, e.g. ``config.ollama.model``
     """
+    return _CONFIG
+
+
+def _build_config() -> AppConfig:
+    """Read the configuration from the .env file and the environment."""
     # Load .env file if exists
-    load_dotenv()
+    _load_env()
     
-    config = {
-        "ollama": {
-            "base_url": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
-            "model": os.getenv("OLLAMA_MODEL", "llama2"),
-        },
-        "ocr": {
-            "tesseract_path": os.getenv("TESSERACT_PATH", None),
-            "language": os.getenv("OCR_LANGUAGE", "eng"),
-        }
-    }
+    env = os.environ
+    return AppConfig(
+        ollama=OllamaConfig(
+            base_url=env.get("OLLAMA_BASE_URL", "http://localhost:11434"),
+            model=env.get("OLLAMA_MODEL", "llama2")
+        ),
+        ocr=OCRConfig(
+            tesseract_path=env.get("TESSERACT_PATH"),
+            language=env.get("OCR_LANGUAGE", "eng")
+        )
+    )
+
+
+def _host_port(base_url: str) -> Tuple[str, int]:
+    """
+    Return the (host, port) a base URL connects to.
     
-    return config
+    Without an explicit port this is the scheme's default, as for the HTTP requests;
+    OLLAMA's own port 11434 is only assumed for a bare "host" without a scheme.
+    """
+    if "://" not in base_url:
+        url = urlparse(f"//{base_url}")
+        default_port = 11434
+    else:
+        url = urlparse(base_url)
+        default_port = 443 if url.scheme == "https" else 80
+    return url.hostname or "localhost", url.port or default_port
 
 
 def check_ollama_availability(base_url: str = "http://localhost:11434") -> bool:
     """
     Check if OLLAMA service is available.
     
+    This only checks that the server accepts TCP connections, which fails
+    immediately when nothing is listening; use check_ollama_api_ready to verify
+    that the API itself responds.
+    
+    Successful results are cached per base URL for the life of the process;
+    failures are not, so a server that is still starting is probed again on the
+    next call. Call ``check_ollama_availability.cache_clear()`` to forget them.
+    
     Args:
         base_url: OLLAMA API base URL
         
     Returns:
         True if available, False otherwise
     """
-    import requests
+    if base_url in _AVAILABLE_URLS:
+        return True
+    
+    try:
+        with socket.create_connection(_host_port(base_url), timeout=0.25):
+            pass
+    except OSError:
+        return False
+    
+    _AVAILABLE_URLS.add(base_url)
+    return True
+
+
+check_ollama_availability.cache_clear = _AVAILABLE_URLS.clear
+
+
+def check_ollama_api_ready(base_url: str = "http://localhost:11434") -> bool:
+    """
+    Check that the OLLAMA API answers HTTP requests.
     
+    Args:
+        base_url: OLLAMA API base URL
+        
+    Returns:
+        True if the API responds, False otherwise
+    """
+    session = _get_session()
     try:
-        response = requests.get(f"{base_url}/api/tags", timeout=5)
-        return response.status_code == 200
+        # HEAD skips the model list body; a short connect timeout fails fast on a down server.
+        # Any non-5xx answer (e.g. 405 if HEAD is not routed) means the server is up.
+        response = session.head(
+            f"{base_url}/api/tags",
+            timeout=(1, 2),
+            allow_redirects=False
+        )
+        return response.status_code < 500
     except Exception:
         return False
 
 
+def _cached_models(base_url: str) -> Optional[List[str]]:
+    """Return the cached model list for a base URL, or None if missing or expired."""
+    cached = _MODELS_CACHE.get(base_url)
+    if cached is not None and time.monotonic() - cached[0] < _MODELS_TTL:
+        return cached[1]
+    return None
+
+
+def get_ollama_status(base_url: str = "http://localhost:11434") -> Tuple[bool, List[str]]:
+    """
+    Check OLLAMA availability and list its models with a single request.
+    
+    Successful results are cached per base URL for 30 seconds, and concurrent
+    callers wait for a single request instead of each sending their own. Call
+    ``list_available_models.cache_clear()`` to force a refresh.
+    
+    Args:
+        base_url: OLLAMA API base URL
+        
+    Returns:
+        (available, model names); the list is empty when unavailable
+    """
+    models = _cached_models(base_url)
+    if models is not None:
+        return True, list(models)
+    
+    with _MODELS_LOCK:
+        fetch_lock = _FETCH_LOCKS.setdefault(base_url, threading.Lock())
+    with fetch_lock:
+        # Another caller may have fetched the list while this one waited
+        models = _cached_models(base_url)
+        if models is not None:
+            return True, list(models)
+        
+        session = _get_session()
+        try:
+            with session.get(f"{base_url}/api/tags", timeout=5, stream=ijson is not None) as response:
+                if response.status_code != 200:
+                    return False, []
+                if ijson is not None:
+                    # Pull just the names off the wire; per-model details are never built
+                    response.raw.decode_content = True
+                    models = list(ijson.items(response.raw, 'models.item.name'))
+                else:
+                    data = orjson.loads(response.content) if orjson is not None else response.json()
+                    models = list(map(itemgetter('name'), data.get('models') or ()))
+        except Exception:
+            return False, []
+        
+        with _MODELS_LOCK:
+            _MODELS_CACHE[base_url] = (time.monotonic(), models)
+        return True, list(models)
+
+
 def list_available_models(base_url: str = "http://localhost:11434") -> list:
     """
     List available OLLAMA models.
     
+    Results are cached for 30 seconds (see get_ollama_status); call
+    ``list_available_models.cache_clear()`` to force a refresh.
+    
     Args:
         base_url: OLLAMA API base URL
         
     Returns:
         List of model names
     """
-    import requests
+    return get_ollama_status(base_url)[1]
+
+
+def _clear_models_cache() -> None:
+    """Drop all cached model lists."""
+    with _MODELS_LOCK:
+        _MODELS_CACHE.clear()
+
+
+list_available_models.cache_clear = _clear_models_cache
+
+
+async def acheck_ollama_availability(base_url: str = "http://localhost:11434") -> bool:
+    """
+    Check if OLLAMA service is available, without blocking the event loop.
     
+    Like check_ollama_availability, this only checks that the server accepts
+    TCP connections, but it is not cached. Probes of several servers can be
+    run together with asyncio.gather.
+    
+    Args:
+        base_url: OLLAMA API base URL
+        
+    Returns:
+        True if available, False otherwise
+    """
+    host, port = _host_port(base_url)
     try:
-        response = requests.get(f"{base_url}/api/tags", timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            return [model['name'] for model in data.get('models', [])]
-        return []
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 0.25)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def alist_available_models(base_url: str = "http://localhost:11434") -> list:
+    """
+    List available OLLAMA models, without blocking the event loop.
+    
+    Shares list_available_models' 30 second cache.
+    
+    Args:
+        base_url: OLLAMA API base URL
+        
+    Returns:
+        List of model names
+    """
+    models = _cached_models(base_url)
+    if models is not None:
+        return list(models)
+    
+    client = await _get_async_client()
+    try:
+        response = await client.get(f"{base_url}/api/tags")
+        if response.status_code != 200:
+            return []
+        data = orjson.loads(response.content) if orjson is not None else response.json()
+        models = list(map(itemgetter('name'), data.get('models') or ()))
     except Exception:
         return []
+    
+    with _MODELS_LOCK:
+        _MODELS_CACHE[base_url] = (time.monotonic(), models)
+    return list(models)
+
+
+# Read once at import; every load_config call returns this same object
+_CONFIG: Final[AppConfig] = _build_config()
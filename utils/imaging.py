@@ -0,0 +1,70 @@
+"""
+Imaging utilities for generating sample documents
+"""
+
+from functools import lru_cache
+import numpy as np
+from PIL import Image, ImageFont
+
+
+DEJAVU_SANS = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+DEJAVU_SANS_BOLD = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+
+@lru_cache(maxsize=32)
+def get_font(path: str, size: int) -> ImageFont.ImageFont:
+    """
+    Load a TrueType font, falling back to PIL's default font if unavailable.
+
+    Fonts are cached per (path, size), so generating many images parses each
+    font file only once.
+
+    Args:
+        path: Path to a .ttf font file
+        size: Font size in points
+
+    Returns:
+        Font object (shared between callers; treat as read-only)
+    """
+    try:
+        return ImageFont.truetype(path, size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def white_canvas(width: int, height: int) -> Image.Image:
+    """
+    Create a white RGB image.
+
+    NumPy fills the buffer with a single memset, which is faster than PIL's
+    per-pixel color fill for document-sized canvases.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        White RGB image
+    """
+    return Image.fromarray(np.full((height, width, 3), 255, dtype=np.uint8), "RGB")
+
+
+def save_binarized(image: Image.Image, output_path: str, threshold: int = 192) -> Image.Image:
+    """
+    Save an image as 1-bit black and white.
+
+    Tesseract binarizes every input before recognition; handing it a bilevel image
+    lets it skip that pass. The default threshold keeps gray text as black. PNGs are
+    written with fast, light compression since sample images are short-lived.
+
+    Args:
+        image: Image to save
+        output_path: Destination path
+        threshold: Gray level below which pixels become black
+
+    Returns:
+        The binarized image, so callers can use it without reading the file back
+    """
+    binarized = image.convert("L").point(lambda p: 255 if p >= threshold else 0, mode="1")
+    binarized.save(output_path, compress_level=1, optimize=False)
+    return binarized